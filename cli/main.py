@@ -1,30 +1,30 @@
 #!/usr/bin/env python3
 """ShellMind CLI - Command-line interface for ShellMind"""
 
+import re
 import sys
-import json
+import shlex
+import queue
+import threading
 import subprocess
-from pathlib import Path
+from collections import deque
+from functools import lru_cache
 import click
-import questionary
 from rich.console import Console, Group
-from rich.markdown import Markdown
 from rich.panel import Panel
 from rich.prompt import Prompt, Confirm
 from rich.align import Align
 from rich.text import Text
-from rich.table import Table
+from rich.style import Style
 from rich import box
 from rich.rule import Rule
 from rich.padding import Padding
 
-# Add src to path so we can import from it
-src_path = Path(__file__).parent.parent / "src"
-sys.path.insert(0, str(src_path))
+from src.config import ConfigManager
+from src.ui_utils import syntax_highlight_output, format_command_with_explanation
 
-from agent import ShellMind  # noqa: E402
-from config import ConfigManager  # noqa: E402
-from ui_utils import syntax_highlight_output, format_command_with_explanation  # noqa: E402
+# Heavier modules (the agent/LLM stack, questionary, rich.markdown, rich.table, rich.live)
+# are imported where they are used so `--version` and `--set-mode` start fast.
 
 # --- UI Constants ---
 THEME_PRIMARY = "bright_magenta"
@@ -37,115 +37,141 @@ THEME_COMMAND = "dodger_blue2"
 THEME_ACCENT = "deep_pink2"
 THEME_SUBTLE = "grey50"
 
+# --- Command execution limits ---
+OUTPUT_TAIL_LINES = 500      # lines of each stream kept for the final output panels
+LIVE_PREVIEW_LINES = 15      # lines shown in the live panel while the command runs
+OUTPUT_BATCH_SIZE = 200      # max lines drained per live refresh
+OUTPUT_QUEUE_SIZE = 1000     # backpressure on a chatty child process
+# Anything the shell would interpret; commands without these can skip /bin/sh
+SHELL_META = re.compile(r"[|&;<>()$`\\\"'*?\[\]#~=%{}!\n]")
+
+# --- Static UI chrome (built once, reused every turn) ---
+THINKING_PREFIX = Text.assemble(
+    ("💭 ", THEME_ACCENT),
+    ("Thinking: ", "bold " + THEME_ACCENT)
+)
+RESPONSE_TITLE = Text("▸ Response", style="bold " + THEME_SECONDARY)
+COMMAND_TITLE = Text("⚡ Command", style="bold " + THEME_COMMAND)
+SECURITY_WARNING_TITLE = Text("⚠️  Security Warning", style=f"bold {THEME_ERROR}")
+FOLLOW_UP_RULE = Rule(
+    Text("✦ Follow-up Required ✦", style=f"bold {THEME_PRIMARY}"),
+    style=THEME_PRIMARY
+)
+CLARIFICATION_TITLE = Text("Clarification Needed", style=f"bold {THEME_WARNING}")
+ANSWER_PROMPT = Text.assemble(
+    ("\n  ✎ ", THEME_SECONDARY),
+    ("Your answer", f"bold {THEME_SECONDARY}")
+)
+SELECTED_PREFIX = Text.assemble(
+    ("  ✓ ", THEME_SUCCESS),
+    ("Selected: ", "bold " + THEME_SUCCESS)
+)
+RECORDED_PREFIX = Text.assemble(
+    ("  ✓ ", THEME_SUCCESS),
+    ("Recorded: ", "bold " + THEME_SUCCESS)
+)
+PROCESSING_TEXT = Text("⏳ Processing your answers...", style=f"italic {THEME_SUBTLE}")
+EXECUTE_CONFIRM = Text("Execute this command?", style=f"bold {THEME_WARNING}")
+EXECUTION_OUTPUT_TITLE = Text("✓ Execution Output", style=f"bold {THEME_SUCCESS}")
+ERROR_OUTPUT_TITLE = Text("✖ Error Output", style=f"bold {THEME_ERROR}")
+USER_PROMPT = Text.assemble(
+    ("  ▸ ", THEME_SECONDARY),
+    ("You", f"bold {THEME_SECONDARY}"),
+    (" › ", THEME_SUBTLE)
+)
+# Panel layouts used by display_response; only the body changes per turn
+THINKING_STYLE = THEME_SUBTLE + " italic"
+THINKING_PANEL = dict(border_style=THEME_SUBTLE, box=box.ROUNDED, padding=(0, 2))
+RESPONSE_PANEL = dict(
+    border_style=THEME_SECONDARY, box=box.ROUNDED, padding=(1, 2),
+    title=RESPONSE_TITLE, title_align="left"
+)
+COMMAND_PANEL = dict(
+    title=COMMAND_TITLE, title_align="left",
+    border_style=THEME_COMMAND, box=box.HEAVY, padding=(0, 2)
+)
+WARNING_PANEL = dict(
+    title=SECURITY_WARNING_TITLE, title_align="left",
+    border_style=THEME_ERROR, box=box.DOUBLE, padding=(1, 3)
+)
+WARNING_STYLE = f"bold {THEME_WARNING}"
+# Pre-parsed styles for text rebuilt on every question or live refresh
+QUESTION_LABEL_STYLE = Style.parse(f"bold {THEME_ACCENT}")
+QUESTION_STYLE = Style.parse("white")
+ANSWER_STYLE = Style.parse(THEME_DIM)
+STDOUT_LINE_STYLE = Style.parse(THEME_DIM)
+STDERR_LINE_STYLE = Style.parse(THEME_ERROR)
+RUNNING_TITLE = Text("⏳ Running", style=f"bold {THEME_SUBTLE}")
+LINE_BREAK = Text("\n")
+# Static arguments of the follow-up option picker
+SELECT_OPTIONS = dict(
+    instruction="[Use ↑↓ arrows to navigate, Enter to select]",
+    qmark="▸",
+    pointer="❯"
+)
+FAREWELL = Group(
+    Text(""),
+    Align.center(Text("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", style=THEME_PRIMARY)),
+    Align.center(Text("Thank you for using ShellMind!", style="bold " + THEME_PRIMARY)),
+    Align.center(Text("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", style=THEME_PRIMARY)),
+    Text(""),
+)
+
 console = Console(highlight=True)
 config_manager = ConfigManager()
 
 def display_response(response):
+    from rich.markdown import Markdown
+
     console.print()  # Breathing room before response
     
     parts = []
     
     if response.thinking:
         # More elegant thinking display with subtle styling
-        thinking_content = Padding(
-            Text.assemble(
-                ("💭 ", THEME_ACCENT),
-                ("Thinking: ", "bold " + THEME_ACCENT),
-                (response.thinking, THEME_SUBTLE + " italic")
-            ),
-            (0, 2)
-        )
-        parts.append(Panel(
-            thinking_content,
-            border_style=THEME_SUBTLE,
-            box=box.ROUNDED,
-            padding=(0, 2)
-        ))
+        thinking_text = THINKING_PREFIX.copy()
+        thinking_text.append(response.thinking, THINKING_STYLE)
+        parts.append(Panel(Padding(thinking_text, (0, 2)), **THINKING_PANEL))
         parts.append("") # Spacer
     
-    if response.output.content:
-        content = response.output.content
-        
-        # Check if content looks like raw JSON (should have been parsed already, but handle it just in case)
-        if content.strip().startswith('{'):
-            try:
-                # Try to parse as JSON
-                parsed = json.loads(content)
-                if isinstance(parsed, dict):
-                    # If we have a nested structure, extract the actual content
-                    if "output" in parsed and isinstance(parsed["output"], dict):
-                        if "content" in parsed["output"] and parsed["output"]["content"]:
-                            content = parsed["output"]["content"]
-                        elif "command" in parsed["output"]:
-                            # Only command, no content to display
-                            content = None
-                        else:
-                            # Output dict but no meaningful content
-                            content = None
-                    elif "content" in parsed:
-                        content = parsed["content"]
-                    else:
-                        # JSON but not the expected structure - don't display raw JSON
-                        content = None
-            except (json.JSONDecodeError, ValueError, KeyError):
-                # Not valid JSON, display as-is (or hide if it looks malformed)
-                if '"thinking"' in content or '"output"' in content or '"command"' in content:
-                    # Looks like malformed JSON response, don't display
-                    content = None
-        
-        if content and content.strip():
-            # Elegant content panel with subtle border
-            content_panel = Panel(
-                Markdown(content),
-                border_style=THEME_SECONDARY,
-                box=box.ROUNDED,
-                padding=(1, 2),
-                title=Text("▸ Response", style="bold " + THEME_SECONDARY),
-                title_align="left"
-            )
-            parts.append(content_panel)
-            parts.append("")
+    # Content is already normalized by LlmService, so it can be rendered as-is
+    content = response.output.content
+    # isspace() answers "anything visible?" without copying the content like strip() would
+    if content and not content.isspace():
+        # Elegant content panel with subtle border
+        parts.append(Panel(Markdown(content), **RESPONSE_PANEL))
+        parts.append("")
 
     if response.output.command:
         # Format command with inline explanations
         formatted_command = format_command_with_explanation(response.output.command)
         
         # Beautiful command panel with enhanced styling
-        parts.append(Panel(
-            Padding(formatted_command, (1, 2)), 
-            title=Text("⚡ Command", style="bold " + THEME_COMMAND), 
-            title_align="left",
-            border_style=THEME_COMMAND, 
-            box=box.HEAVY,
-            padding=(0, 2)
-        ))
+        parts.append(Panel(Padding(formatted_command, (1, 2)), **COMMAND_PANEL))
         parts.append("")
     
     if response.output.warning:
         # Enhanced warning panel with better visibility
-        parts.append(Panel(
-            Text(response.output.warning, style=f"bold {THEME_WARNING}"), 
-            title=Text("⚠️  Security Warning", style=f"bold {THEME_ERROR}"), 
-            title_align="left",
-            border_style=THEME_ERROR,
-            box=box.DOUBLE,
-            padding=(1, 3)
-        ))
+        parts.append(Panel(Text(response.output.warning, style=WARNING_STYLE), **WARNING_PANEL))
         parts.append("")
 
     console.print(Group(*parts))
 
+def _question_text(idx, question):
+    text = Text(f"❓ Question {idx}: ", style=QUESTION_LABEL_STYLE)
+    text.append(question, style=QUESTION_STYLE)
+    return text
+
 def handle_follow_ups(app, follow_ups):
     if not follow_ups:
         return None
 
+    import questionary
+
     console.print()
     
     # Elegant follow-up header with rule
-    console.print(Rule(
-        Text("✦ Follow-up Required ✦", style=f"bold {THEME_PRIMARY}"),
-        style=THEME_PRIMARY
-    ))
+    console.print(FOLLOW_UP_RULE)
     console.print()
     
     answers = []
@@ -153,10 +179,7 @@ def handle_follow_ups(app, follow_ups):
         console.print()
         
         if q.options:
-            question_text = Text.assemble(
-                (f"❓ Question {idx}: ", f"bold {THEME_ACCENT}"),
-                (q.question, "white")
-            )
+            question_text = _question_text(idx, q.question)
             console.print(Panel(
                 question_text,
                 border_style=THEME_SECONDARY,
@@ -165,53 +188,181 @@ def handle_follow_ups(app, follow_ups):
             ))
             console.print()
             
-            selected_option = questionary.select(
-                "",  
-                choices=q.options,
-                instruction="[Use ↑↓ arrows to navigate, Enter to select]",
-                qmark="▸",
-                pointer="❯"
-            ).ask()
+            selected_option = questionary.select("", choices=q.options, **SELECT_OPTIONS).ask()
             
             if not selected_option:
                 raise KeyboardInterrupt
             
             answers.append(f"Question: {q.question}\nAnswer: {selected_option}")
-            console.print(Text.assemble(
-                ("  ✓ ", THEME_SUCCESS),
-                ("Selected: ", "bold " + THEME_SUCCESS),
-                (selected_option, THEME_DIM)
-            ))
+            selected_text = SELECTED_PREFIX.copy()
+            selected_text.append(selected_option, ANSWER_STYLE)
+            console.print(selected_text)
         else:
-            question_text = Text.assemble(
-                (f"❓ Question {idx}: ", f"bold {THEME_ACCENT}"),
-                (q.question, "white")
-            )
+            question_text = _question_text(idx, q.question)
             console.print(Panel(
                 question_text,
-                title=Text("Clarification Needed", style=f"bold {THEME_WARNING}"),
+                title=CLARIFICATION_TITLE,
                 border_style=THEME_WARNING,
                 box=box.ROUNDED,
                 padding=(1, 3)
             ))
             
-            prompt_text = Text.assemble(
-                ("\n  ✎ ", THEME_SECONDARY),
-                ("Your answer", f"bold {THEME_SECONDARY}")
-            )
-            answer = Prompt.ask(prompt_text)
+            answer = Prompt.ask(ANSWER_PROMPT)
             answers.append(f"Question: {q.question}\nAnswer: {answer}")
-            console.print(Text.assemble(
-                ("  ✓ ", THEME_SUCCESS),
-                ("Recorded: ", "bold " + THEME_SUCCESS),
-                (answer, THEME_DIM)
-            ))
+            recorded_text = RECORDED_PREFIX.copy()
+            recorded_text.append(answer, ANSWER_STYLE)
+            console.print(recorded_text)
     
     console.print()
-    console.print(Text("⏳ Processing your answers...", style=f"italic {THEME_SUBTLE}"))
+    console.print(PROCESSING_TEXT)
     return "\n".join(answers)
 
+def _pump_stream(stream, name, sink):
+    """Forward lines from a child pipe into the sink queue, then signal EOF with None."""
+    try:
+        for line in stream:
+            sink.put((name, line))
+    finally:
+        stream.close()
+        sink.put((name, None))
+
+def execute_and_stream(command):
+    """
+    Run a shell command, streaming its output into a live panel as it is produced.
+    Only the last OUTPUT_TAIL_LINES lines of each stream are kept for the final panels,
+    so memory stays bounded no matter how chatty the command is; the panels say how
+    many earlier lines were left out.
+    Returns the command's exit code (1 if it could not be started).
+    """
+    from rich.live import Live
+
+    console.print(Text(f"⚙️  Executing: {command}", style=f"italic {THEME_SUBTLE}"))
+    console.print()
+    # Output that is not valid UTF-8 (binary files, other locales) is shown with
+    # replacement characters instead of killing the reader thread
+    popen_kwargs = dict(text=True, errors="replace", bufsize=1, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        proc = None
+        if not SHELL_META.search(command):
+            # A plain "program args" line: exec it directly instead of forking a shell first
+            try:
+                proc = subprocess.Popen(shlex.split(command), **popen_kwargs)
+            except OSError:
+                # Not an executable on PATH (e.g. a shell builtin), a script without a shebang,
+                # or not executable at all: the shell runs it or reports it as it always did
+                pass
+        if proc is None:
+            proc = subprocess.Popen(command, shell=True, **popen_kwargs)
+    except Exception as exec_err:
+        console.print(Text(f"✖ Execution Failed: {exec_err}", style=f"bold {THEME_ERROR}"))
+        return 1
+
+    lines = queue.Queue(maxsize=OUTPUT_QUEUE_SIZE)
+    for stream, name in ((proc.stdout, "stdout"), (proc.stderr, "stderr")):
+        threading.Thread(target=_pump_stream, args=(stream, name, lines), daemon=True).start()
+
+    tails = {
+        "stdout": deque(maxlen=OUTPUT_TAIL_LINES),
+        "stderr": deque(maxlen=OUTPUT_TAIL_LINES),
+    }
+    seen = {"stdout": 0, "stderr": 0}
+    recent = deque(maxlen=LIVE_PREVIEW_LINES)
+    open_streams = 2
+
+    with Live(console=console, refresh_per_second=10, transient=True) as live:
+        while open_streams:
+            # Block for the first line, then drain whatever else is ready as one batch
+            batch = [lines.get()]
+            while len(batch) < OUTPUT_BATCH_SIZE:
+                try:
+                    batch.append(lines.get_nowait())
+                except queue.Empty:
+                    break
+
+            for name, line in batch:
+                if line is None:
+                    open_streams -= 1
+                    continue
+                line = line.rstrip("\n")
+                tails[name].append(line)
+                seen[name] += 1
+                # Styled once on arrival, not again on every refresh it stays visible for
+                recent.append(Text(line, style=STDERR_LINE_STYLE if name == "stderr" else STDOUT_LINE_STYLE))
+
+            live.update(Panel(
+                LINE_BREAK.join(recent),
+                title=RUNNING_TITLE,
+                border_style=THEME_SUBTLE,
+                box=box.ROUNDED,
+                padding=(0, 2),
+                title_align="left"
+            ))
+
+    returncode = proc.wait()
+
+    console.print()
+    stdout = "\n".join(tails["stdout"]).strip()
+    stderr = "\n".join(tails["stderr"]).strip()
+    omitted = {
+        name: f"… {seen[name] - OUTPUT_TAIL_LINES} earlier lines omitted"
+        if seen[name] > OUTPUT_TAIL_LINES else None
+        for name in seen
+    }
+    if stdout:
+        # Apply syntax highlighting to output
+        highlighted_output = syntax_highlight_output(stdout)
+        console.print(Panel(
+            highlighted_output,
+            title=EXECUTION_OUTPUT_TITLE,
+            subtitle=omitted["stdout"],
+            border_style=THEME_SUCCESS,
+            box=box.ROUNDED,
+            padding=(1, 2),
+            title_align="left",
+            subtitle_align="left"
+        ))
+    if stderr:
+        console.print(Panel(
+            stderr,
+            title=ERROR_OUTPUT_TITLE,
+            subtitle=omitted["stderr"],
+            border_style=THEME_ERROR,
+            box=box.ROUNDED,
+            padding=(1, 2),
+            title_align="left",
+            subtitle_align="left"
+        ))
+    console.print()
+    return returncode
+
+def confirm_and_execute(command, auto_execute=None):
+    """
+    Ask before running a suggested command unless auto_execute already decided.
+    Returns the exit code, or None if the command was not run.
+    """
+    should_execute = auto_execute
+    if should_execute is None:
+        should_execute = Confirm.ask(EXECUTE_CONFIRM)
+    if not should_execute:
+        return None
+    from src.agent import invalidate_environment
+
+    try:
+        return execute_and_stream(command)
+    finally:
+        # The command may have switched branches or committed; the next session re-detects
+        invalidate_environment()
+
+def answer_follow_ups(app, response, use_tools):
+    """Ask the response's follow-up questions, send the answers and show the reply."""
+    answers = handle_follow_ups(app, response.follow_ups)
+    response = app.run(f"Answers to follow-up questions:\n{answers}", use_tools=use_tools)
+    display_response(response)
+    return response
+
 def run_query(query_text, explain_mode=False, auto_execute=None, use_tools=False):
+    from src.agent import ShellMind
+
     app = ShellMind(console=console)
     
     try:
@@ -227,62 +378,21 @@ def run_query(query_text, explain_mode=False, auto_execute=None, use_tools=False
         # Regular query mode
         response = app.run(query_text, use_tools=use_tools)
         
-        # Handle follow-ups and commands loop
+        # Each response is rendered exactly once, when it arrives
+        display_response(response)
         while True:
-            display_response(response)
-            
             # Step 1: Handle command execution if present
             if response.output.command:
-                should_execute = auto_execute
-                if should_execute is None:
-                    confirm_text = Text("Execute this command?", style="bold " + THEME_WARNING)
-                    should_execute = Confirm.ask(confirm_text)
-                
-                if should_execute:
-                    console.print(Text(f"⚙️  Executing: {response.output.command}", style=f"italic {THEME_SUBTLE}"))
-                    console.print()
-                    try:
-                        result = subprocess.run(response.output.command, shell=True, text=True, capture_output=True)
-                        console.print()
-                        if result.stdout:
-                            # Apply syntax highlighting to output
-                            highlighted_output = syntax_highlight_output(result.stdout.strip())
-                            console.print(Panel(
-                                highlighted_output, 
-                                title=Text("✓ Execution Output", style=f"bold {THEME_SUCCESS}"), 
-                                border_style=THEME_SUCCESS,
-                                box=box.ROUNDED,
-                                padding=(1, 2),
-                                title_align="left"
-                            ))
-                        if result.stderr:
-                            console.print(Panel(
-                                result.stderr.strip(), 
-                                title=Text("✖ Error Output", style=f"bold {THEME_ERROR}"), 
-                                border_style=THEME_ERROR,
-                                box=box.ROUNDED,
-                                padding=(1, 2),
-                                title_align="left"
-                            ))
-                        console.print()
-                        # If this was the last step (no follow-ups), we can return the exit code
-                        if not response.follow_ups:
-                            return result.returncode
-                    except Exception as exec_err:
-                        console.print(Text(f"✖ Execution Failed: {exec_err}", style=f"bold {THEME_ERROR}"))
-                        if not response.follow_ups:
-                            return 1
-
-            # Step 2: Handle follow-ups if present
-            if response.follow_ups:
-                answers = handle_follow_ups(app, response.follow_ups)
-                response = app.run(f"Answers to follow-up questions:\n{answers}", use_tools=use_tools)
-                continue
-            
-            # If no follow-ups, we've finished this turn
-            break
-        
-        return 0
+                exit_code = confirm_and_execute(response.output.command, auto_execute)
+                # If this was the last step (no follow-ups), we can return the exit code
+                if exit_code is not None and not response.follow_ups:
+                    return exit_code
+
+            # Step 2: No follow-ups means we've finished this turn
+            if not response.follow_ups:
+                return 0
+
+            response = answer_follow_ups(app, response, use_tools)
     
     except KeyboardInterrupt:
         console.print(Text("\nCancelled", style=THEME_WARNING))
@@ -290,15 +400,23 @@ def run_query(query_text, explain_mode=False, auto_execute=None, use_tools=False
     except Exception as e:
         console.print(Text(f"Error: {e}", style="bold " + THEME_ERROR))
         return 1
+    finally:
+        app.close()
+
+@lru_cache(maxsize=4)
+def rendered_banner(width):
+    """The banner laid out for a terminal width, as ready-to-write segments."""
+    from rich.segment import Segments
+
+    options = console.options.update_width(width)
+    return Segments(list(console.render(startup_banner(), options)))
+
+@lru_cache(maxsize=1)
+def startup_banner():
+    """Build the interactive-mode banner once; it never changes within a process."""
+    from rich.table import Table
 
-def run_interactive(use_tools=False):
-    """Run ShellMind in interactive mode."""
-    app = ShellMind(console=console)
-    
-    console.clear()
-    
     # Title section with improved ASCII art and gradient
-    console.print()
     title_lines = [
         "  ███████╗██╗  ██╗███████╗██╗     ██╗     ███╗   ███╗██╗███╗   ██╗██████╗ ",
         "  ██╔════╝██║  ██║██╔════╝██║     ██║     ████╗ ████║██║████╗  ██║██╔══██╗",
@@ -312,16 +430,10 @@ def run_interactive(use_tools=False):
         "bright_magenta", "magenta", "medium_purple", "medium_purple1", "deep_sky_blue2", "bright_cyan"
     ]
     
-    for line, color in zip(title_lines, gradient_colors):
-        console.print(Align.center(Text(line, style=f"bold {color}")))
-    console.print()
-
-    # Tagline with better styling
-    console.print(Align.center(Text("Your intelligent shell assistant", style="bold white")))
-    console.print(Align.center(Text("AI-driven command synthesis for a seamless terminal experience", style="italic " + THEME_SUBTLE)))
-    console.print()
-    console.print(Align.center(Rule(style=THEME_PRIMARY)))
-    console.print()
+    title = [
+        Align.center(Text(line, style=f"bold {color}"))
+        for line, color in zip(title_lines, gradient_colors)
+    ]
 
     # Quick start guide with improved layout
     quick_start = Table.grid(padding=(0, 3))
@@ -384,28 +496,47 @@ def run_interactive(use_tools=False):
         expand=False
     )
     
-    console.print(Align.center(panel))
-    console.print()
+    return Group(
+        Text(""),
+        *title,
+        Text(""),
+        # Tagline with better styling
+        Align.center(Text("Your intelligent shell assistant", style="bold white")),
+        Align.center(Text("AI-driven command synthesis for a seamless terminal experience", style="italic " + THEME_SUBTLE)),
+        Text(""),
+        Align.center(Rule(style=THEME_PRIMARY)),
+        Text(""),
+        Align.center(panel),
+        Text(""),
+    )
+
+def run_interactive(use_tools=False):
+    """Run ShellMind in interactive mode."""
+    console.clear()
+    
+    # Show the banner before importing and building the agent, so it appears immediately
+    console.print(rendered_banner(console.width))
+
+    from src.agent import ShellMind
+
+    app = ShellMind(console=console)
+
+    # The mode cannot change within a session, so its indicator is built once
+    status_text = Text()
+    status_text.append("  Agent Mode: ", style=THEME_SUBTLE)
+    if use_tools:
+        status_text.append("●", style=f"bold {THEME_SUCCESS}")
+        status_text.append(" ON", style=f"bold {THEME_SUCCESS}")
+    else:
+        status_text.append("○", style=THEME_SUBTLE)
+        status_text.append(" OFF", style=THEME_SUBTLE)
 
     while True:
         try:
             # Show mode status with better styling
-            status_text = Text()
-            status_text.append("  Agent Mode: ", style=THEME_SUBTLE)
-            if use_tools:
-                status_text.append("●", style=f"bold {THEME_SUCCESS}")
-                status_text.append(" ON", style=f"bold {THEME_SUCCESS}")
-            else:
-                status_text.append("○", style=THEME_SUBTLE)
-                status_text.append(" OFF", style=THEME_SUBTLE)
             console.print(status_text, justify="right")
 
-            prompt_text = Text.assemble(
-                ("  ▸ ", THEME_SECONDARY),
-                ("You", f"bold {THEME_SECONDARY}"),
-                (" › ", THEME_SUBTLE)
-            )
-            user_input = Prompt.ask(prompt_text)
+            user_input = Prompt.ask(USER_PROMPT)
             
             if user_input.lower().startswith('/explain'):
                 response = app.explain(user_input)
@@ -423,18 +554,14 @@ def run_interactive(use_tools=False):
                 continue
             
             if user_input.lower() in ['exit', 'quit']:
-                console.print()
-                console.print(Align.center(Text("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", style=THEME_PRIMARY)))
-                console.print(Align.center(Text("Thank you for using ShellMind!", style="bold " + THEME_PRIMARY)))
-                console.print(Align.center(Text("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", style=THEME_PRIMARY)))
-                console.print()
+                console.print(FAREWELL)
                 break
             
             response = app.run(user_input, use_tools=use_tools)
             
+            # Each response is rendered exactly once, when it arrives
+            display_response(response)
             while True:
-                display_response(response)
-                
                 # Step 1: Handle command execution if present
                 if response.output.command:
                     # In Agent mode, we still allow execution of suggested commands
@@ -448,52 +575,16 @@ def run_interactive(use_tools=False):
                             padding=(0, 2)
                         ))
                     
-                    confirm_text = Text("Execute this command?", style=f"bold {THEME_WARNING}")
-                    if Confirm.ask(confirm_text):
-                        console.print(Text(f"⚙️  Executing: {response.output.command}", style=f"italic {THEME_SUBTLE}"))
-                        console.print()
-                        try:
-                            result = subprocess.run(response.output.command, shell=True, text=True, capture_output=True)
-                            console.print()
-                            if result.stdout:
-                                # Apply syntax highlighting to output
-                                highlighted_output = syntax_highlight_output(result.stdout.strip())
-                                console.print(Panel(
-                                    highlighted_output, 
-                                    title=Text("✓ Execution Output", style=f"bold {THEME_SUCCESS}"), 
-                                    border_style=THEME_SUCCESS,
-                                    box=box.ROUNDED,
-                                    padding=(1, 2),
-                                    title_align="left"
-                                ))
-                            if result.stderr:
-                                console.print(Panel(
-                                    result.stderr.strip(), 
-                                    title=Text("✖ Error Output", style=f"bold {THEME_ERROR}"), 
-                                    border_style=THEME_ERROR,
-                                    box=box.ROUNDED,
-                                    padding=(1, 2),
-                                    title_align="left"
-                                ))
-                            console.print()
-                        except Exception as exec_err:
-                            console.print(Text(f"✖ Execution Failed: {exec_err}", style=f"bold {THEME_ERROR}"))
-
-                # Step 2: Handle follow-ups if present
-                if response.follow_ups:
-                    answers = handle_follow_ups(app, response.follow_ups)
-                    response = app.run(f"Answers to follow-up questions:\n{answers}", use_tools=use_tools)
-                    continue
+                    confirm_and_execute(response.output.command)
 
-                # Turn is complete
-                break
+                # Step 2: No follow-ups means the turn is complete
+                if not response.follow_ups:
+                    break
+
+                response = answer_follow_ups(app, response, use_tools)
                 
         except KeyboardInterrupt:
-            console.print()
-            console.print(Align.center(Text("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", style=THEME_PRIMARY)))
-            console.print(Align.center(Text("Thank you for using ShellMind!", style="bold " + THEME_PRIMARY)))
-            console.print(Align.center(Text("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", style=THEME_PRIMARY)))
-            console.print()
+            console.print(FAREWELL)
             break
         except Exception as e:
             console.print(Panel(
@@ -504,6 +595,8 @@ def run_interactive(use_tools=False):
                 padding=(1, 2)
             ))
 
+    app.close()
+
 @click.command()
 @click.argument('query', required=False)
 @click.option('--explain', is_flag=True, help='Explain a command instead of generating one')
@@ -520,6 +613,7 @@ def main(query, explain, execute, version, agent, set_mode):
     if set_mode:
         agent_mode_val = (set_mode == 'agent')
         config_manager.agent_mode = agent_mode_val
+        config_manager.flush()
         mode_str = "Agent Mode" if agent_mode_val else "Default Mode"
         click.echo(f"Configuration updated: Set to {mode_str}")
         return
@@ -0,0 +1 @@
+# Core ShellMind package: agent, LLM service, prompts and tools
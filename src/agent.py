@@ -1,15 +1,74 @@
-from llm import LlmService
-from prompt import SYSTEM_PROMPT, EXPLAIN_PROMPT
-from tools.tool_registry import ToolRegistry
-from tools.env_detector import EnvironmentDetector
-from rich.console import Console
-from rich.live import Live
+from .llm import LlmService, tool_call_to_dict, compact_messages
+from .prompt import SYSTEM_PROMPT, EXPLAIN_PROMPT
+from .tools.tool_registry import ToolRegistry
+from .tools.env_detector import EnvironmentDetector
+from .config import EnvCache
+from .serialization import loads as json_loads, dumps as json_dumps, JSONDecodeError
+from rich.console import Console, Group
 from rich.text import Text
-from rich.spinner import Spinner
-import json
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from abc import ABC, abstractmethod
-from rich.table import Table
-from rich import box
+
+# Upper bound on parallel-safe tools running at once in a single step
+MAX_PARALLEL_TOOLS = 8
+
+# Number of recent user/assistant exchanges kept in history; the system prompt is always kept
+MAX_HISTORY_TURNS = 20
+
+# Shared, never-mutated prefix of every /explain request
+_EXPLAIN_BASE = ({"role": "system", "content": EXPLAIN_PROMPT},)
+
+# How long add_system_prompt waits on background environment detection
+ENV_DETECT_TIMEOUT = 10.0
+
+# How long a detected environment is reused within the process; git state may change
+ENV_MESSAGE_TTL = 30.0  # seconds
+
+# Tools that can change what detection reports (git branch, dirty files, installed tools)
+ENV_CHANGING_TOOLS = frozenset({"run_command", "write_file"})
+
+# Environment detection runs here so it overlaps client setup and the first prompt
+_env_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shellmind-env")
+
+# (cwd, shell) -> (monotonic time, system message) of recent detections
+_env_messages = {}
+
+def _environment_message(cwd: str, shell: str) -> str:
+    """
+    Detect the environment for (cwd, shell) and return the ready-to-send system message.
+    Results are reused for ENV_MESSAGE_TTL seconds. The OS and installed tools are also
+    shared across processes through a short-lived on-disk cache; git state is not, since
+    it can change outside ShellMind, so each process asks git afresh. Failures are not
+    cached, so a later ShellMind instance will retry detection.
+    """
+    entry = _env_messages.get((cwd, shell))
+    if entry is not None and time.monotonic() - entry[0] < ENV_MESSAGE_TTL:
+        return entry[1]
+
+    detector = EnvironmentDetector()
+    cache = EnvCache()
+    key = f"{cwd}|{shell}"
+    env_info = cache.get(key)
+    if env_info is None:
+        env_info = detector.detect_base(cwd)
+        cache.set(key, env_info)
+    env_info = {**env_info, **detector.detect_git(env_info)}
+    message = f"Current Environment Information:\n{json_dumps(env_info)}"
+    _env_messages[(cwd, shell)] = (time.monotonic(), message)
+    return message
+
+def invalidate_environment(cwd: str = None, shell: str = None):
+    """
+    Forget the detected environment for (cwd, shell), defaulting to the current ones, so the
+    next ShellMind detects it afresh. Call after running something that may change it.
+    """
+    cwd = os.getcwd() if cwd is None else cwd
+    shell = os.environ.get("SHELL", "unknown") if shell is None else shell
+    _env_messages.pop((cwd, shell), None)
+    EnvCache().delete(f"{cwd}|{shell}")
 
 class AgentUI(ABC):
     @abstractmethod
@@ -30,41 +89,97 @@ class AgentUI(ABC):
     @abstractmethod
     def on_warning(self, message: str): pass
 
+    def on_stream_update(self, partial):
+        """Called with a partially-generated Response while it streams in. Optional."""
+        pass
+
+    def flush_tool_output(self):
+        """Called after a group of tools finishes, for UIs that buffer on_tool_end. Optional."""
+        pass
+
+class _StreamPreview:
+    """Live renderable showing the latest partial response under a spinner."""
+
+    def __init__(self, spinner):
+        self.spinner = spinner
+        self.partial = None
+
+    def __rich__(self):
+        from rich.markdown import Markdown
+
+        output = getattr(self.partial, "output", None)
+        parts = [self.spinner]
+        thinking = getattr(self.partial, "thinking", None)
+        if thinking:
+            parts.append(Text(thinking, style="dim italic"))
+        if output is not None and output.content:
+            parts.append(Markdown(output.content))
+        if output is not None and output.command:
+            parts.append(Text(f"$ {output.command}", style="bold bright_cyan"))
+        # Keep the spinner on top; the transient Live is cleared once the full response renders
+        return Group(*parts)
+
 class RichConsoleUI(AgentUI):
+    # A dots spinner looks the same at 4 fps and repaints far less than at 10
+    SPINNER_REFRESH_PER_SECOND = 4
+
     def __init__(self, console: Console = None):
         self.console = console or Console()
         self.live = None
         self.progress = None
+        self._spinners = {}
+        self._stream_preview = _StreamPreview(self._get_spinner("Generating..."))
+        # on_tool_end previews, printed together by flush_tool_output
+        self._pending_tool_renders = []
         
     def _get_spinner(self, message):
-        return Spinner("dots", text=Text(message, style="bold green"))
+        # Spinners are reusable renderables, so build one per distinct message
+        spinner = self._spinners.get(message)
+        if spinner is None:
+            from rich.spinner import Spinner
+            spinner = self._spinners[message] = Spinner("dots", text=Text(message, style="bold green"))
+        return spinner
 
     def on_thinking_start(self, message: str):
-        if self.live:
-            self.live.stop()
-        self.live = Live(self._get_spinner(message), console=self.console, refresh_per_second=10, transient=True)
-        self.live.start()
+        # One Live is shared by every LLM call and restarted as needed instead of rebuilt
+        if self.live is None:
+            from rich.live import Live
+            self.live = Live(
+                console=self.console,
+                refresh_per_second=self.SPINNER_REFRESH_PER_SECOND,
+                transient=True
+            )
+        self.live.update(self._get_spinner(message))
+        if not self.live.is_started:
+            self.live.start()
 
     def on_thinking_end(self):
-        if self.live:
+        if self.live and self.live.is_started:
             self.live.stop()
-            self.live = None
+
+    def on_stream_update(self, partial):
+        if not self.live or not self.live.is_started:
+            return
+        # Only remember the newest partial; the preview renders it when Live next refreshes,
+        # so the markdown is parsed at the refresh rate rather than once per token
+        self._stream_preview.partial = partial
+        if self.live.renderable is not self._stream_preview:
+            self.live.update(self._stream_preview)
 
     def on_tool_start(self, tool_name: str, args: dict):
-        # We stop the live spinner for tool execution to allow for user interaction
-        # (e.g. confirmation prompts) and clean output logging.
-        if self.live and self.live.is_started:
-            self.live.stop()
-        
+        # The spinner keeps running here; prints land above the Live display. ShellMind
+        # stops it (via on_thinking_end) before tools that prompt the user.
         # Show more informative tool usage message
         args_preview = ""
         if args:
             # Show first argument as preview
             first_key = list(args.keys())[0] if args else None
             if first_key and args[first_key]:
-                arg_value = str(args[first_key])
-                if len(arg_value) > 50:
-                    arg_value = arg_value[:47] + "..."
+                value = args[first_key]
+                # Slice strings before copying; write_file content can be very large
+                if not isinstance(value, str):
+                    value = str(value)
+                arg_value = value[:47] + "..." if len(value) > 50 else value
                 args_preview = f" ({arg_value})"
             
         self.console.print(Text.assemble(
@@ -73,24 +188,29 @@ class RichConsoleUI(AgentUI):
             (tool_name, "bold bright_cyan"),
             (args_preview, "dim italic")
         ))
-        
-        # We do NOT restart the spinner here. It stays stopped while the tool runs.
-        # This is critical for interactive tools (like run_command asking for confirmation).
-        # It will be restarted in on_tool_end.
 
     def on_tool_end(self, result: str):
         # Print a short preview of the result 
         result_preview = result[:200] + "..." if len(result) > 200 else result
-        self.console.print(Text(f"   ↳ {result_preview}", style="dim white"))
-        
-        # Restart the thinking spinner if it was active before the tool started
-        if self.live and not self.live.is_started:
-            self.live.start()
+        self._pending_tool_renders.append(Text(f"   ↳ {result_preview}", style="dim white"))
+        # The shared spinner is restarted by the next on_thinking_start, so a run that
+        # ends right after a tool never leaves it spinning
+
+    def flush_tool_output(self):
+        # One print for a whole parallel batch instead of one terminal write per tool
+        if self._pending_tool_renders:
+            self.console.print(Group(*self._pending_tool_renders))
+            self._pending_tool_renders = []
 
     def on_todo_update(self, todo_list: list):
         if not todo_list:
             return
+        # Keep earlier results above the table
+        self.flush_tool_output()
             
+        from rich.table import Table
+        from rich import box
+
         table = Table(title="📝 Task List", show_header=True, header_style="bold magenta", box=box.ROUNDED)
         table.add_column("Status", width=12)
         table.add_column("Task")
@@ -120,61 +240,170 @@ class RichConsoleUI(AgentUI):
         self.console.print(f"[dim red]Warning: {message}[/dim red]")
 
 class ShellMind:
-    def __init__(self, ui: AgentUI = None, console: Console = None):
+    def __init__(self, ui: AgentUI = None, console: Console = None, max_history_turns: int = MAX_HISTORY_TURNS):
+        self._env_future = _env_executor.submit(
+            _environment_message, os.getcwd(), os.environ.get("SHELL", "unknown")
+        )
         self.llm = LlmService()
-        self.messages = []
-        self.console = console or Console()
+        # Stable prefix (system prompt + environment): sent first every request and never
+        # rewritten, so providers can reuse their cached encoding of it across turns
+        self._prefix = []
+        # User/assistant/tool turns; the only part that grows and gets trimmed
+        self._rollout = []
+        # One Console is shared by ShellMind, its UI and the tools that print
+        if console is None:
+            console = ui.console if isinstance(ui, RichConsoleUI) else Console()
+        self.console = console
         self.tool_registry = ToolRegistry(console=self.console)
         # Backwards compatibility: if console is provided but no ui, use RichConsoleUI
         if ui is None:
-            self.ui = RichConsoleUI(console)
+            self.ui = RichConsoleUI(self.console)
         else:
             self.ui = ui
         # Maintain a single TODO list that gets updated
         self.current_todo_list = []
+        self._max_turns = max_history_turns
+        self._elided_count = 0
+        # Summary lines of messages dropped by compaction, carried in the elision marker
+        self._elided_excerpts = []
+        self._elision_marker = None
+        # Most recent assistant message, so /explain does not rescan the history
+        self._last_assistant_msg = None
+        self._runner = None
+
+    @property
+    def messages(self) -> list[dict]:
+        """The full conversation as sent to the LLM."""
+        return self._prefix + self._rollout
     
     def add_system_prompt(self, prompt=SYSTEM_PROMPT):
-        self.messages.append({"role": "system", "content": prompt})
+        self._prefix.append({"role": "system", "content": prompt})
         
         try:
-            detector = EnvironmentDetector()
-            env_info = detector.run()
-            self.messages.append({
+            self._prefix.append({
                 "role": "system", 
-                "content": f"Current Environment Information:\n{env_info}"
+                "content": self._env_future.result(timeout=ENV_DETECT_TIMEOUT)
             })
+        except FuturesTimeoutError:
+            self.ui.on_warning("Environment detection timed out; continuing without it")
         except Exception as e:
             self.ui.on_warning(f"Could not detect environment: {e}")
+
+    def _trim_history(self, max_turns=None):
+        """
+        Keep only the most recent turns of the rollout, so each request does not resend
+        the whole session. Dropped messages are replaced by one user-role note, since
+        providers reject system messages after the conversation has started.
+        """
+        max_turns = self._max_turns if max_turns is None else max_turns
+        history = self._rollout
+        if history and history[0] is self._elision_marker:
+            history = history[1:]
+
+        cut = len(history) - 2 * max_turns
+        if cut <= 0:
+            return
+        # Never start the window on a tool result: its assistant tool_calls message would be gone
+        while cut < len(history) and history[cut]["role"] == "tool":
+            cut += 1
+        self._elide(history, cut)
+
+    def _compact_history(self):
+        """
+        Once the conversation outgrows the model's prompt budget, drop its oldest whole turns
+        and keep excerpts of them in the elision marker. The rollout itself is rewritten, so
+        requests until the next compaction all start with the same messages and stay
+        cacheable by the provider.
+        """
+        history = self._rollout
+        if history and history[0] is self._elision_marker:
+            history = history[1:]
+        cut, excerpts = compact_messages(
+            history, self.llm.prompt_budget, fixed=self._prefix, excerpts=self._elided_excerpts
+        )
+        if cut:
+            self._elided_excerpts = excerpts
+            self._elide(history, cut)
+
+    def _elide(self, history, cut):
+        """Replace history[:cut] (the rollout without its marker) by an updated marker."""
+        self._elided_count += cut
+        content = f"[Note: {self._elided_count} earlier messages of this conversation were elided]"
+        if self._elided_excerpts:
+            content += "\nExcerpts of some of them, oldest first:\n" + "\n".join(self._elided_excerpts)
+        self._elision_marker = {"role": "user", "content": content}
+        self._rollout = [self._elision_marker] + history[cut:]
+
+    def _request_messages(self) -> list[dict]:
+        """The conversation to send with the next request, compacted first if needed."""
+        self._compact_history()
+        return self.messages
     
     def add_user_message(self, user_input):
-        self.messages.append({"role": "user", "content": user_input})
+        self._rollout.append({"role": "user", "content": user_input})
+
+    def _add_assistant_message(self, message: dict):
+        self._rollout.append(message)
+        self._last_assistant_msg = message
+
+    def _run_sync(self, coro, async_name):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            coro.close()
+            raise RuntimeError(
+                f"ShellMind.{async_name[1:]}() cannot be called from a running event loop; "
+                f"await ShellMind.{async_name}() instead"
+            )
+        # One loop for the whole session: the async HTTP client keeps connections bound to it
+        if self._runner is None:
+            self._runner = asyncio.Runner()
+        return self._runner.run(coro)
+
+    def close(self):
+        """Close the event loop behind run() and explain(); a later call starts a new one."""
+        if self._runner is not None:
+            self._runner.close()
+            self._runner = None
 
     def run(self, user_input, use_tools=True, max_iterations=30):
-        if not self.messages:
+        """Blocking entry point for callers that are not running an event loop."""
+        return self._run_sync(self.arun(user_input, use_tools=use_tools, max_iterations=max_iterations), "arun")
+
+    async def arun(self, user_input, use_tools=True, max_iterations=30):
+        if not self._prefix:
             self.add_system_prompt()
         
         self.add_user_message(user_input)
-        
+        try:
+            return await self._run_turn(use_tools, max_iterations)
+        finally:
+            # Bound what is kept (and resent next turn) however the turn ended
+            self._trim_history()
+
+    async def _run_turn(self, use_tools, max_iterations):
         if not use_tools or not self.tool_registry.tool_schemas:
-            return self._run_without_tools()
+            return await self._run_without_tools()
 
         # Main agent loop for tool use and multi-step reasoning
         for i in range(max_iterations):
-            response, should_stop = self._run_with_tools_step()
+            response, should_stop = await self._run_with_tools_step()
             if should_stop:
                 return response
         
         # If we reached here, it means max_iterations was exceeded
-        from llm import Response, Output
+        from .llm import Response, Output
         return Response(
             thinking="Max iterations reached",
             output=Output(content="I reached the maximum number of iterations for this task. Please try a more specific request.")
         )
     
-    def _run_without_tools(self):
+    async def _run_without_tools(self):
         self.ui.on_thinking_start("Thinking...")
         try:
-            response = self.llm.generate(self.messages)
+            response = await self.llm.agenerate(self._request_messages(), on_partial=self.ui.on_stream_update)
         finally:
             self.ui.on_thinking_end()
 
@@ -182,17 +411,17 @@ class ShellMind:
             content = response.output.content or ""
             if response.output.command:
                 content += f"\\nCommand: {response.output.command}"
-            self.messages.append({"role": "assistant", "content": content})
+            self._add_assistant_message({"role": "assistant", "content": content})
         
         return response
     
-    def _run_with_tools_step(self):
+    async def _run_with_tools_step(self):
         """Perform a single iteration of the tool loop."""
         self.ui.on_thinking_start("Thinking...")
         try:
             # 1. Ask LLM what to do
-            chat_completion = self.llm.get_raw_completion(
-                self.messages, 
+            chat_completion = await self.llm.aget_raw_completion(
+                self._request_messages(), 
                 self.tool_registry.tool_schemas
             )
         finally:
@@ -205,81 +434,124 @@ class ShellMind:
         if not tool_calls:
             self.ui.on_thinking_start("Thinking...")
             try:
-                response = self.llm.generate(self.messages)
+                response = await self.llm.agenerate(self._request_messages(), on_partial=self.ui.on_stream_update)
             finally:
                 self.ui.on_thinking_end()
 
             # Add to history (structured representation)
-            self.messages.append({
+            self._add_assistant_message({
                 "role": "assistant",
-                "content": str(response)
+                "content": response.to_history_str()
             })
             return response, True
 
         # If tool calls, execute them
-        self.messages.append({
+        self._add_assistant_message({
             "role": "assistant",
             "content": response_message.content,
-            "tool_calls": [
-                {
-                    "id": tc.id,
-                    "type": "function",
-                    "function": {
-                        "name": tc.function.name,
-                        "arguments": tc.function.arguments
-                    }
-                }
-                for tc in tool_calls
-            ]
+            "tool_calls": list(map(tool_call_to_dict, tool_calls))
         })
         
+        await self._execute_tool_calls(tool_calls)
+        return None, False
+
+    async def _execute_tool_calls(self, tool_calls):
+        """
+        Run the requested tools, overlapping consecutive parallel-safe ones.
+        Sequential tools (interactive or state-mutating) act as barriers, and results
+        are appended in the original order so the transcript stays deterministic.
+        """
+        calls = []
         for tool_call in tool_calls:
-            tool_name = tool_call.function.name
             try:
-                args = json.loads(tool_call.function.arguments)
-            except json.JSONDecodeError:
+                args = json_loads(tool_call.function.arguments)
+            except JSONDecodeError:
                 args = {}
-                
-            self.ui.on_tool_start(tool_name, args)
-            result = self.tool_registry.run_tool(tool_name, args)
-            
-            # Update and display the single TODO list
-            if tool_name == "todo_manager" and isinstance(result, list):
-                # Update the current todo list with the new result
+            calls.append((tool_call, tool_call.function.name, args))
+
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_TOOLS)
+
+        async def run_parallel(tool_name, args):
+            async with semaphore:
+                return await self.tool_registry.arun_tool(tool_name, args)
+
+        i = 0
+        try:
+            while i < len(calls):
+                tool_call, tool_name, args = calls[i]
+                # Only tools that prompt the user pay for stopping and restarting the spinner
+                if self.tool_registry.is_interactive(tool_name):
+                    self.ui.on_thinking_end()
+                else:
+                    self.ui.on_thinking_start("Running tools...")
+
+                if self.tool_registry.is_sequential(tool_name):
+                    self.ui.on_tool_start(tool_name, args)
+                    self._record_tool_result(tool_call, tool_name, await self.tool_registry.arun_tool(tool_name, args))
+                    self.ui.flush_tool_output()
+                    i += 1
+                    continue
+
+                # Gather the run of parallel-safe calls up to the next sequential one
+                j = i
+                while j < len(calls) and not self.tool_registry.is_sequential(calls[j][1]):
+                    j += 1
+                batch = calls[i:j]
+                for _, tool_name, args in batch:
+                    self.ui.on_tool_start(tool_name, args)
+                results = await asyncio.gather(*(run_parallel(name, args) for _, name, args in batch))
+                for (tool_call, tool_name, _), result in zip(batch, results):
+                    self._record_tool_result(tool_call, tool_name, result)
+                self.ui.flush_tool_output()
+                i = j
+        finally:
+            self.ui.flush_tool_output()
+            self.ui.on_thinking_end()
+
+    def _record_tool_result(self, tool_call, tool_name, result):
+        # Update and display the single TODO list
+        if tool_name == "todo_manager" and isinstance(result, list):
+            # The model often re-sends the list unchanged; only redraw the table when it changed
+            if result != self.current_todo_list:
                 self.current_todo_list = result
                 self.ui.on_todo_update(self.current_todo_list)
-                
-            self.ui.on_tool_end(str(result))
-            
-            self.messages.append({
-                "tool_call_id": tool_call.id,
-                "role": "tool",
-                "name": tool_name,
-                "content": str(result)
-            })
+
+        if tool_name in ENV_CHANGING_TOOLS:
+            invalidate_environment()
             
-        return None, False
+        self.ui.on_tool_end(str(result))
+        
+        self._rollout.append({
+            "tool_call_id": tool_call.id,
+            "role": "tool",
+            "name": tool_name,
+            "content": str(result)
+        })
 
     def explain(self, user_input):
+        """Blocking entry point for `/explain`."""
+        return self._run_sync(self.aexplain(user_input), "aexplain")
+
+    async def aexplain(self, user_input):
         explain_content = user_input.replace('/explain', '').strip()
         
         if not explain_content:
-            last_msg = next((m["content"] for m in reversed(self.messages) if m["role"] == "assistant"), None)
+            last_msg = self._last_assistant_msg["content"] if self._last_assistant_msg else None
             if last_msg:
                 if "Command: " in last_msg:
-                    explain_content = last_msg.split("Command: ")[-1].strip()
+                    explain_content = last_msg.rpartition("Command: ")[2].strip()
                 else:
                     explain_content = last_msg
             
         if not explain_content:
             return None
 
-        temp_messages = [{"role": "system", "content": EXPLAIN_PROMPT}]
+        temp_messages = list(_EXPLAIN_BASE)
         temp_messages.append({"role": "user", "content": f"Explain this: {explain_content}"})
         
         self.ui.on_thinking_start("Analyzing...")
         try:
-            response = self.llm.generate(temp_messages)
+            response = await self.llm.agenerate(temp_messages, on_partial=self.ui.on_stream_update)
         finally:
             self.ui.on_thinking_end()
         return response
@@ -1,12 +1,20 @@
-import json
+import os
+import time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from .serialization import loads as json_loads, dumps as json_dumps, JSONDecodeError
 
 CONFIG_DIR = Path.home() / ".shellmind"
 CONFIG_FILE = CONFIG_DIR / "config.json"
+ENV_CACHE_FILE = CONFIG_DIR / "env_cache.json"
+ENV_CACHE_TTL = 300  # seconds
+LLM_CACHE_DIR = CONFIG_DIR / "llm_cache"
+LLM_CACHE_TTL = 24 * 60 * 60  # seconds
 
 DEFAULT_CONFIG = {
-    "agent_mode": False
+    "agent_mode": False,
+    "llm_cache_enabled": False,
+    "auto_approve_safe": False
 }
 
 class ConfigManager:
@@ -14,6 +22,7 @@ class ConfigManager:
         self.config_path = CONFIG_FILE
         self._ensure_config_dir()
         self.config = self._load_config()
+        self._dirty = False
 
     def _ensure_config_dir(self):
         if not CONFIG_DIR.exists():
@@ -24,24 +33,44 @@ class ConfigManager:
             return DEFAULT_CONFIG.copy()
         
         try:
-            with open(self.config_path, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, OSError):
+            return json_loads(self.config_path.read_bytes())
+        except (JSONDecodeError, OSError):
             return DEFAULT_CONFIG.copy()
 
     def save_config(self):
+        # Write to a sibling temp file and swap it in so a crash never leaves a torn config
+        tmp_path = self.config_path.with_suffix(".json.tmp")
         try:
-            with open(self.config_path, 'w') as f:
-                json.dump(self.config, f, indent=4)
+            tmp_path.write_text(json_dumps(self.config, indent=True))
+            os.replace(tmp_path, self.config_path)
+            self._dirty = False
         except OSError as e:
             print(f"Error saving config: {e}")
 
+    def flush(self):
+        """
+        Persist pending changes from set(); a no-op when nothing changed.
+        Nothing flushes automatically, so whoever calls set() calls this when done.
+        """
+        if self._dirty:
+            self.save_config()
+
     def get(self, key: str, default: Any = None) -> Any:
         return self.config.get(key, default)
 
     def set(self, key: str, value: Any):
+        if key in self.config and self.config[key] == value:
+            return
         self.config[key] = value
-        self.save_config()
+        self._dirty = True
+
+    @property
+    def llm_cache_enabled(self) -> bool:
+        return self.get("llm_cache_enabled", False)
+
+    @property
+    def auto_approve_safe(self) -> bool:
+        return self.get("auto_approve_safe", False)
 
     @property
     def agent_mode(self) -> bool:
@@ -50,3 +79,52 @@ class ConfigManager:
     @agent_mode.setter
     def agent_mode(self, value: bool):
         self.set("agent_mode", value)
+
+
+class EnvCache:
+    """
+    Short-lived on-disk cache of environment detection results, keyed by caller-chosen
+    strings (e.g. cwd + shell). Each entry expires ENV_CACHE_TTL seconds after it was
+    written, however often the file itself is rewritten.
+    """
+
+    def __init__(self, path: Path = ENV_CACHE_FILE, ttl: float = ENV_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+
+    def _load(self) -> Dict[str, Any]:
+        """Unexpired entries, as {key: {"time": written at, "value": value}}."""
+        try:
+            entries = json_loads(self.path.read_bytes())
+        except (JSONDecodeError, OSError):
+            return {}
+        if not isinstance(entries, dict):
+            return {}
+        cutoff = time.time() - self.ttl
+        # Entries from before per-entry timestamps have no "time" and count as expired
+        return {
+            key: entry for key, entry in entries.items()
+            if isinstance(entry, dict) and entry.get("time", 0) >= cutoff
+        }
+
+    def _save(self, entries: Dict[str, Any]):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json_dumps(entries))
+        except OSError:
+            # A missing cache only costs a re-detection next time
+            pass
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._load().get(key)
+        return None if entry is None else entry.get("value")
+
+    def set(self, key: str, value: Any):
+        entries = self._load()
+        entries[key] = {"time": time.time(), "value": value}
+        self._save(entries)
+
+    def delete(self, key: str):
+        entries = self._load()
+        if entries.pop(key, None) is not None:
+            self._save(entries)
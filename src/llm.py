@@ -1,13 +1,43 @@
 import os
-import json
-import instructor
-from groq import Groq
-from pydantic import BaseModel, Field
+import re
+import time
+import hashlib
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import Optional, Callable, Any, Union
 from dataclasses import dataclass
-from dotenv import load_dotenv
+from functools import lru_cache
+from pathlib import Path
+from .serialization import loads as json_loads, dumps_bytes, JSONDecodeError
+from .config import ConfigManager, LLM_CACHE_DIR, LLM_CACHE_TTL
 
-load_dotenv()
+
+@lru_cache(maxsize=None)
+def _load_env():
+    # Deferred to the first LlmService so importing this module stays cheap
+    from dotenv import load_dotenv
+    load_dotenv()
+
+# Context windows of the default models, in tokens; other models are assumed to have
+# DEFAULT_CONTEXT_TOKENS
+MODEL_CONTEXT_TOKENS = {
+    "moonshotai/kimi-k2-instruct-0905": 262_144,
+    "minimax/minimax-m2.1": 204_800,
+}
+DEFAULT_CONTEXT_TOKENS = 128_000
+# Share of the context window the history may fill before its oldest turns are compacted;
+# the rest covers the reply, the tool schemas and the error of the ~4 characters per token
+# estimate
+PROMPT_BUDGET_SHARE = 0.5
+# Characters of each elided message kept in the compaction summary
+SUMMARY_EXCERPT_CHARS = 160
+# Upper bound on the compaction summary, which carries over from one compaction to the next
+MAX_SUMMARY_CHARS = 8000
+
+# Matches content whose first non-whitespace character opens a JSON object,
+# without copying the (possibly large) string the way .strip() would
+_JSON_OBJECT_START = re.compile(r"\s*\{")
+# Keys of the Response schema; finding one in unparseable content means it is broken JSON
+_RESPONSE_KEY = re.compile(r'"(?:thinking|output|command)"')
 
 
 class Question(BaseModel):
@@ -25,23 +55,142 @@ class Response(BaseModel):
     thinking: Optional[str] = Field(default=None, description="Internal thought process")
     output: Output
     follow_ups: Optional[list[Question]] = Field(default=None, description="Follow-up questions")
+    _history_str: Optional[str] = PrivateAttr(default=None)
+
+    def to_history_str(self) -> str:
+        """
+        Text stored as the assistant message in the conversation history.
+        Built once per response; call it only after the output has been normalized.
+        """
+        if self._history_str is None:
+            parts = []
+            if self.thinking:
+                parts.append(f"Thinking: {self.thinking}")
+            if self.output.content:
+                parts.append(self.output.content)
+            if self.output.command:
+                parts.append(f"Command: {self.output.command}")
+            self._history_str = "\n".join(parts) if parts else "Response(no content)"
+        return self._history_str
     
     def __str__(self) -> str:
         """Return a clean string representation instead of JSON."""
-        parts = []
-        if self.thinking:
-            parts.append(f"Thinking: {self.thinking}")
-        if self.output.content:
-            parts.append(self.output.content)
-        if self.output.command:
-            parts.append(f"Command: {self.output.command}")
-        return "\n".join(parts) if parts else "Response(no content)"
+        return self.to_history_str()
     
     def __repr__(self) -> str:
         """Return the same clean representation for repr."""
         return self.__str__()
 
 
+def normalize_output(output: Output) -> Output:
+    """
+    Unwrap content that the model returned as a raw JSON blob instead of prose.
+    The UI can then render `output.content` and `output.command` as-is.
+    """
+    content = output.content
+    # Prose never reaches the parser: the anchored match only looks at leading whitespace
+    if not content or not _JSON_OBJECT_START.match(content):
+        return output
+
+    # No key pre-scan before parsing: any JSON object must be unwrapped or hidden, not
+    # just response-shaped ones, and the C parser rejects non-JSON at its first bad byte
+    try:
+        parsed = json_loads(content)
+    except (JSONDecodeError, ValueError):
+        # Looks like a malformed JSON response, don't surface it as content
+        if _RESPONSE_KEY.search(content):
+            output.content = None
+        return output
+
+    if not isinstance(parsed, dict):
+        return output
+
+    nested = parsed.get("output")
+    if isinstance(nested, dict):
+        # Only keep real content; a bare command/warning has no prose to display
+        output.content = nested.get("content") or None
+        if not output.command and nested.get("command"):
+            output.command = nested["command"]
+        if not output.warning and nested.get("warning"):
+            output.warning = nested["warning"]
+    elif "content" in parsed:
+        output.content = parsed["content"]
+    else:
+        # JSON but not the expected structure - don't display raw JSON
+        output.content = None
+    return output
+
+
+def _estimate_tokens(message: dict) -> int:
+    size = len(message.get("content") or "")
+    for tool_call in message.get("tool_calls") or ():
+        size += len(tool_call["function"]["arguments"] or "")
+    return size // 4
+
+
+def compact_messages(
+    history: list[dict],
+    max_tokens: int,
+    fixed: list[dict] = (),
+    excerpts: list[str] = ()
+) -> tuple[int, list[str]]:
+    """
+    Fit a conversation into a rough token budget by dropping its oldest whole turns.
+    fixed are the messages sent with it every time (the system prompts), and excerpts the
+    summary lines of turns dropped earlier.
+
+    Returns (cut, excerpts): history[cut:] is what to keep, and excerpts the summary lines
+    extended with a short excerpt of each dropped message, trimmed from the oldest end to
+    MAX_SUMMARY_CHARS. cut is 0 when nothing needs to go. Every cut is at a user message, so
+    tool_calls groups are never split, and the current turn (from the last user message on)
+    is always kept whole, so the result can stay over budget.
+    """
+    excerpts = list(excerpts)
+    costs = [_estimate_tokens(m) for m in history]
+    fixed_cost = sum(_estimate_tokens(m) for m in fixed)
+    if fixed_cost + sum(costs) <= max_tokens:
+        return 0, excerpts
+
+    turn_starts = [i for i in range(1, len(history)) if history[i]["role"] == "user"]
+    if not turn_starts:
+        return 0, excerpts
+
+    # Keep as many of the newest turns as fit next to the summary
+    budget = max_tokens - fixed_cost - MAX_SUMMARY_CHARS // 4
+    cut = turn_starts[-1]
+    kept = sum(costs[cut:])
+    for start in reversed(turn_starts[:-1]):
+        kept += sum(costs[start:cut])
+        if kept > budget:
+            break
+        cut = start
+
+    for message in history[:cut]:
+        content = (message.get("content") or "").replace("\n", " ")
+        if not content:
+            continue
+        if len(content) > SUMMARY_EXCERPT_CHARS:
+            content = content[:SUMMARY_EXCERPT_CHARS] + "..."
+        excerpts.append(f"- {message['role']}: {content}")
+    # The newest dropped turns are the most relevant, so the oldest lines go first
+    size = sum(len(line) + 1 for line in excerpts)
+    start = 0
+    while size > MAX_SUMMARY_CHARS and start < len(excerpts):
+        size -= len(excerpts[start]) + 1
+        start += 1
+    return cut, excerpts[start:]
+
+
+def tool_call_to_dict(tool_call) -> dict:
+    """Convert an SDK tool call into the dict shape the chat API expects in history."""
+    function = tool_call.function
+    return {
+        "id": tool_call.id,
+        "type": "function",
+        "function": {"name": function.name, "arguments": function.arguments}
+    }
+
+
 @dataclass
 class ToolCall:
     """Represents a tool call request from the LLM."""
@@ -58,8 +207,63 @@ class ToolCallResult:
     content: str
 
 
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of structured responses, one JSON file per request.
+    Entries expire LLM_CACHE_TTL seconds after they were written and are deleted once
+    expired, so the directory does not grow without bound.
+    """
+
+    def __init__(self, directory: Path = LLM_CACHE_DIR, ttl: float = LLM_CACHE_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        self.prune()
+
+    def prune(self):
+        """Delete every expired entry."""
+        cutoff = time.time() - self.ttl
+        try:
+            paths = list(self.directory.glob("*.json"))
+        except OSError:
+            return
+        for path in paths:
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                # Removed by another process, or not ours to delete
+                pass
+
+    @staticmethod
+    def key(model: str, messages: list[dict], temperature: float) -> str:
+        payload = dumps_bytes([model, temperature, messages], sort_keys=True, default=str)
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, key: str) -> Optional[Response]:
+        path = self.directory / f"{key}.json"
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink()
+                return None
+            return Response.model_validate_json(path.read_bytes())
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, response: Response):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            (self.directory / f"{key}.json").write_text(response.model_dump_json())
+        except OSError:
+            # A cache write failure only costs a repeated request later
+            pass
+
+
 class LlmService:
-    def __init__(self):
+    def __init__(self, cache_enabled: bool = None):
+        # The SDKs and instructor are the slowest imports in the app; load them on first use
+        import instructor
+
+        _load_env()
         self.provider = os.environ.get("LLM_PROVIDER", "groq").lower()
         
         # Default model for Groq if not specified
@@ -69,55 +273,147 @@ class LlmService:
             default_model = "minimax/minimax-m2.1"
             
         self.model_name = os.environ.get("LLM_MODEL", default_model)
+        self.temperature = 0.3
+        # Estimated tokens the conversation may reach before ShellMind compacts its oldest turns
+        self.prompt_budget = int(
+            MODEL_CONTEXT_TOKENS.get(self.model_name, DEFAULT_CONTEXT_TOKENS) * PROMPT_BUDGET_SHARE
+        )
+        # Groq and most OpenRouter models reuse identical prompt prefixes on their own;
+        # Anthropic models only cache up to an explicit cache_control breakpoint
+        self._explicit_prompt_cache = (
+            self.provider == "openrouter" and self.model_name.startswith("anthropic/")
+        )
+
+        if cache_enabled is None:
+            cache_enabled = ConfigManager().llm_cache_enabled
+        self.cache = ResponseCache() if cache_enabled else None
         
         if self.provider == "openrouter":
-            from openai import OpenAI
+            from openai import OpenAI, AsyncOpenAI
             api_key = os.environ.get("OPENROUTER_API_KEY")
+            base_url = "https://openrouter.ai/api/v1"
             self.client = instructor.from_openai(
-                OpenAI(
-                    api_key=api_key,
-                    base_url="https://openrouter.ai/api/v1",
-                ),
+                OpenAI(api_key=api_key, base_url=base_url),
+                mode=instructor.Mode.JSON
+            )
+            self.aclient = instructor.from_openai(
+                AsyncOpenAI(api_key=api_key, base_url=base_url),
                 mode=instructor.Mode.JSON
             )
         else:
-            from groq import Groq
+            from groq import Groq, AsyncGroq
+            api_key = os.environ.get("GROQ_API_KEY")
             self.client = instructor.from_groq(
-                Groq(api_key=os.environ.get("GROQ_API_KEY")),
+                Groq(api_key=api_key),
                 mode=instructor.Mode.JSON
             )
-    
-    def generate(self, messages, retry_count=0, max_retries=2) -> Response:
-        try:
-            # filters out tool calls from messages if any exist, as simple generate shouldn't see them usually 
-            # or handle them if they are part of history
-            
-            return self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                response_model=Response,
-                temperature=0.3
-            )
-        except Exception as e:
-            # Fallback for severe failures
-            return Response(
-                thinking="Error occurred", 
-                output=Output(content=f"Failed to generate message due to error: {str(e)}")
+            self.aclient = instructor.from_groq(
+                AsyncGroq(api_key=api_key),
+                mode=instructor.Mode.JSON
             )
 
-    def get_raw_completion(self, messages: list[dict], tools: list[dict] = None) -> Any:
-        """Get raw completion from LLM, potentially with tool calls."""
+    def _prepare_messages(self, messages: list[dict]) -> list[dict]:
+        if not self._explicit_prompt_cache or not messages:
+            return messages
+        first = messages[0]
+        if first["role"] != "system" or not isinstance(first["content"], str):
+            return messages
+        # The static system prompt leads every request, so it is the prefix worth caching
+        cached = {
+            "role": "system",
+            "content": [{"type": "text", "text": first["content"], "cache_control": {"type": "ephemeral"}}]
+        }
+        return [cached] + messages[1:]
+
+    def _generate_kwargs(self, messages) -> dict:
+        return {
+            "model": self.model_name,
+            "messages": self._prepare_messages(messages),
+            "response_model": Response,
+            "temperature": self.temperature
+        }
+
+    def _raw_completion_kwargs(self, messages, tools=None) -> dict:
         kwargs = {
             "model": self.model_name,
-            "messages": messages,
+            "messages": self._prepare_messages(messages),
             "response_model": None,
-            "temperature": 0.3
+            "temperature": self.temperature
         }
         if tools:
             kwargs["tools"] = tools
             kwargs["tool_choice"] = "auto"
-            
-        return self.client.chat.completions.create(**kwargs)
+        return kwargs
+
+    @staticmethod
+    def _error_response(e: Exception) -> Response:
+        # Fallback for severe failures
+        return Response(
+            thinking="Error occurred", 
+            output=Output(content=f"Failed to generate message due to error: {str(e)}")
+        )
+    
+    def _cache_key(self, messages, cache: bool) -> Optional[str]:
+        if not cache or self.cache is None:
+            return None
+        return ResponseCache.key(self.model_name, messages, self.temperature)
+
+    def generate(self, messages, retry_count=0, max_retries=2, cache: bool = True) -> Response:
+        key = self._cache_key(messages, cache)
+        if key and (cached := self.cache.get(key)):
+            return cached
+        try:
+            response = self.client.chat.completions.create(**self._generate_kwargs(messages))
+        except Exception as e:
+            return self._error_response(e)
+        normalize_output(response.output)
+        if key:
+            self.cache.set(key, response)
+        return response
+
+    async def agenerate(
+        self, 
+        messages, 
+        on_partial: Callable[[Any], None] = None, 
+        cache: bool = True
+    ) -> Response:
+        """
+        Async variant of generate; awaits the network round-trip instead of blocking.
+        If on_partial is given, the response is streamed and on_partial receives each
+        partially-filled Response as tokens arrive, so the UI can render before the end.
+        """
+        key = self._cache_key(messages, cache)
+        if key and (cached := self.cache.get(key)):
+            return cached
+        try:
+            if on_partial is None:
+                response = await self.aclient.chat.completions.create(**self._generate_kwargs(messages))
+            else:
+                response = await self._astream_generate(messages, on_partial)
+        except Exception as e:
+            return self._error_response(e)
+        normalize_output(response.output)
+        if key:
+            self.cache.set(key, response)
+        return response
+
+    async def _astream_generate(self, messages, on_partial: Callable[[Any], None]) -> Response:
+        kwargs = self._generate_kwargs(messages)
+        partial = None
+        async for partial in self.aclient.chat.completions.create_partial(**kwargs):
+            on_partial(partial)
+        if partial is None:
+            raise ValueError("Empty response stream")
+        # The last partial carries every field; validate it into a regular Response
+        return Response.model_validate(partial.model_dump())
+
+    def get_raw_completion(self, messages: list[dict], tools: list[dict] = None) -> Any:
+        """Get raw completion from LLM, potentially with tool calls."""
+        return self.client.chat.completions.create(**self._raw_completion_kwargs(messages, tools))
+
+    async def aget_raw_completion(self, messages: list[dict], tools: list[dict] = None) -> Any:
+        """Async variant of get_raw_completion."""
+        return await self.aclient.chat.completions.create(**self._raw_completion_kwargs(messages, tools))
 
     def generate_with_tools(
         self, 
@@ -156,25 +452,15 @@ class LlmService:
                 working_messages.append({
                     "role": "assistant",
                     "content": response_message.content,
-                    "tool_calls": [
-                        {
-                            "id": tc.id,
-                            "type": "function",
-                            "function": {
-                                "name": tc.function.name,
-                                "arguments": tc.function.arguments
-                            }
-                        }
-                        for tc in tool_calls
-                    ]
+                    "tool_calls": list(map(tool_call_to_dict, tool_calls))
                 })
                 
                 # Execute tool calls
                 for tool_call in tool_calls:
                     function_name = tool_call.function.name
                     try:
-                        function_args = json.loads(tool_call.function.arguments)
-                    except json.JSONDecodeError:
+                        function_args = json_loads(tool_call.function.arguments)
+                    except JSONDecodeError:
                         function_args = {}
                     
                     tool_result = tool_executor(function_name, function_args)
@@ -1,6 +1,4 @@
-from textwrap import dedent
-
-SYSTEM_PROMPT = dedent("""
+SYSTEM_PROMPT = """
 You are shell-mind, an expert Shell, Linux, and DevOps command assistant.
 
 Your task is to translate natural language requests into precise shell commands.
@@ -104,10 +102,10 @@ Response JSON:
     }
   ]
 }
-""")
+"""
 
 
-EXPLAIN_PROMPT = dedent("""
+EXPLAIN_PROMPT = """
 You are an expert in DevOps, Linux, and CLI tools.
 
 Your task is to analyze and explain the provided command or script clearly and accurately.
@@ -157,4 +155,4 @@ Respond with valid JSON only following this structure:
   }
 }
 
-""")
\ No newline at end of file
+"""
\ No newline at end of file
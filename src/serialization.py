@@ -0,0 +1,40 @@
+"""JSON helpers that use orjson when it is installed and fall back to the stdlib."""
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is a declared dependency; this keeps bare checkouts working
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so one except clause covers both
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data):
+    """Parse a JSON document from str or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(obj, sort_keys: bool = False, default=None) -> bytes:
+    """
+    Serialize obj to compact UTF-8 JSON bytes, e.g. for hashing.
+    Key order is canonical with sort_keys; default converts unsupported objects.
+    """
+    if orjson is not None:
+        option = orjson.OPT_SORT_KEYS if sort_keys else 0
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(
+        obj, sort_keys=sort_keys, default=default, separators=(",", ":"), ensure_ascii=False
+    ).encode()
+
+
+def dumps(obj, indent: bool = False) -> str:
+    """Serialize obj to a JSON string: compact by default, or pretty-printed with 2-space indent."""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, option=option).decode()
+    if indent:
+        return json.dumps(obj, indent=2)
+    return json.dumps(obj, separators=(",", ":"))
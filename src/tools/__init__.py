@@ -0,0 +1 @@
+# Tools exposed to the agent through ToolRegistry
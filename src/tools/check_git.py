@@ -1,19 +1,28 @@
-from textwrap import dedent
+from concurrent.futures import ThreadPoolExecutor
 from .run_cmd import run_command
 
+GIT_INFO_TEMPLATE = (
+    "Git Status: {status}\n"
+    "Git Log: {log}\n"
+    "Git Remote: {remote}\n"
+    "Git Branch: {branch}\n"
+)
+
+GIT_INFO_DESCRIPTION = """
+Retrieves essential Git metadata for the current repository.
+Provides a summary of `git status`, the latest commit log, current branch name, and configured remotes.
+
+Use this to:
+- Quickly assess the state of a repository.
+- Identify the current working branch and recent changes.
+"""
+
 class GitInfo:
     def __init__(self):
         self.name = "git_info"
     
     def description(self):
-        return dedent("""
-        Retrieves essential Git metadata for the current repository.
-        Provides a summary of `git status`, the latest commit log, current branch name, and configured remotes.
-        
-        Use this to:
-        - Quickly assess the state of a repository.
-        - Identify the current working branch and recent changes.
-        """)
+        return GIT_INFO_DESCRIPTION
     
     def json_schema(self):
         return {
@@ -30,14 +39,11 @@ class GitInfo:
         }
     
     def run(self):
-        git_status = run_command("git status")
-        git_log = run_command("git log -n 1")
-        git_branch = run_command("git branch --show-current")
-        git_remote = run_command("git remote -v")
+        # The four queries are independent, so run them side by side
+        commands = ["git status", "git log -n 1", "git branch --show-current", "git remote -v"]
+        with ThreadPoolExecutor(max_workers=len(commands)) as executor:
+            git_status, git_log, git_branch, git_remote = executor.map(run_command, commands)
 
-        return dedent(f"""
-        Git Status: {git_status}
-        Git Log: {git_log}
-        Git Remote: {git_remote}
-        Git Branch: {git_branch}
-        """)
\ No newline at end of file
+        return GIT_INFO_TEMPLATE.format(
+            status=git_status, log=git_log, remote=git_remote, branch=git_branch
+        )
\ No newline at end of file
@@ -1,19 +1,24 @@
-from textwrap import dedent
+import os
+import platform
 from .run_cmd import run_command
 
+PROC_DIR = "/proc"
+
+CHECK_PROCESS_DESCRIPTION = """
+Checks for running processes whose command line contains a specific name.
+Returns detailed process information if matches are found.
+
+Usage:
+- `process_name` should be a substring to search for (e.g., 'nginx', 'python').
+- Use this to verify if services are active or to debug running applications.
+"""
+
 class CheckProcess:
     def __init__(self):
         self.name = "check_process"
     
     def description(self):
-        return dedent("""
-        Checks for running processes matching a specific name using `ps aux`.
-        Returns detailed process information if matches are found.
-        
-        Usage:
-        - `process_name` should be a substring to search for (e.g., 'nginx', 'python').
-        - Use this to verify if services are active or to debug running applications.
-        """)
+        return CHECK_PROCESS_DESCRIPTION
     
     def json_schema(self):
         return {
@@ -35,8 +40,47 @@ class CheckProcess:
         }
     
     def run(self, process_name):
-        # Use a bracket trick to avoid grep finding itself
-        if process_name:
+        if not process_name:
+            return "No process name provided"
+        if platform.system() != "Linux" or not os.path.isdir(PROC_DIR):
+            # Use a bracket trick to avoid grep finding itself
             pattern = f"[{process_name[0]}]{process_name[1:]}"
             return run_command(f"ps aux | grep {pattern}")
-        return "No process name provided"
+
+        hits = self._scan_proc(process_name.encode())
+        if not hits:
+            return f"No running processes found matching '{process_name}'"
+        return "PID\tSTATE\tCOMMAND\n" + "\n".join(hits)
+
+    def _scan_proc(self, needle: bytes) -> list[str]:
+        """
+        Match needle against every process's command line straight from /proc,
+        avoiding a shell, `ps` serializing the whole table and the grep pipe.
+        """
+        own_pid = str(os.getpid())
+        hits = []
+        for pid in os.listdir(PROC_DIR):
+            if not pid.isdigit() or pid == own_pid:
+                continue
+            try:
+                with open(f"{PROC_DIR}/{pid}/cmdline", "rb") as f:
+                    cmdline = f.read()
+                # Like ps, only kernel threads (empty cmdline) are matched by name, so
+                # stat is opened just for those and for actual hits
+                if cmdline and needle not in cmdline:
+                    continue
+                with open(f"{PROC_DIR}/{pid}/stat", "rb") as f:
+                    stat = f.read()
+            except OSError:
+                # The process exited mid-scan or belongs to someone we cannot inspect
+                continue
+
+            # stat is "pid (comm) state ..."; comm may itself contain spaces or parens
+            comm, _, rest = stat.partition(b" (")[2].rpartition(b") ")
+            if not cmdline and needle not in comm:
+                continue
+            # Kernel threads have an empty cmdline, so show their name the way ps does
+            command = cmdline.replace(b"\0", b" ").strip() or b"[" + comm + b"]"
+            state = rest[:1].decode(errors="replace")
+            hits.append(f"{pid}\t{state}\t{command.decode(errors='replace')}")
+        return hits
@@ -1,190 +1,263 @@
-import subprocess
-import json
+import os
+import re
+import sys
+import shlex
+import signal
+import asyncio
 import time
 from .schema import ToolSchema
-from textwrap import dedent
-from rich.console import Console
-from rich.text import Text
-from rich.prompt import Confirm
+from ..config import ConfigManager
+from ..serialization import dumps as json_dumps
 
+# Limit output size to 10KB
+MAX_OUTPUT_SIZE = 10 * 1024  # characters
+# Enough bytes to decode MAX_OUTPUT_SIZE characters of UTF-8; anything past this is discarded
+MAX_CAPTURE_BYTES = MAX_OUTPUT_SIZE * 4
+READ_CHUNK_SIZE = 64 * 1024
+# Chaining, pipes, redirection and substitution can smuggle anything past a prefix check
+SHELL_CONTROL = re.compile(r"[;&|<>`$()\n]")
+# "Command to execute:" in bold white, then the command in bold bright cyan
+COMMAND_BANNER = "\x1b[1;37mCommand to execute: \x1b[0m\x1b[1;96m{}\x1b[0m\n"
+# Terminal control characters (except tab and newline) are dropped, so a command cannot
+# rewrite what the confirmation banner shows
+BANNER_CONTROL_CHARS = dict.fromkeys(c for c in [*range(32), 127] if c not in (9, 10))
+# Commands auto_approve_safe may run without asking, keyed by their leading words and mapped
+# to the options that would make them write, delete or run something else. This is its own
+# allowlist: the "safe" risk level is a display classification and covers commands such as
+# env, curl or git branch that can change things.
+AUTO_APPROVE_COMMANDS = {
+    ("ls",): (), ("cat",): (), ("head",): (), ("tail",): (), ("wc",): (), ("grep",): (),
+    ("echo",): (), ("pwd",): (), ("whoami",): (), ("uptime",): (), ("uname",): (),
+    ("df",): (), ("du",): (), ("free",): (), ("ps",): (), ("which",): (), ("whereis",): (),
+    ("file",): (), ("stat",): (), ("printenv",): (),
+    ("find",): (
+        "-delete", "-exec", "-execdir", "-ok", "-okdir",
+        "-fls", "-fprint", "-fprint0", "-fprintf",
+    ),
+    ("git", "status"): (), ("git", "log"): ("--output",),
+    ("git", "diff"): ("--output",), ("git", "show"): ("--output",),
+    ("docker", "ps"): (), ("docker", "images"): (), ("docker", "inspect"): (), ("docker", "logs"): (),
+    ("kubectl", "get"): (), ("kubectl", "describe"): (), ("kubectl", "logs"): (), ("kubectl", "top"): (),
+}
 
-class CommandExecutor(ToolSchema):
-    """
-    Executes shell commands with safety constraints.
-    Classifies commands by risk level and enforces execution policies.
-    """
-    
-    def __init__(self, console=None):
-        self.name = "run_command"
-        self.console = console or Console()
-        
-        # Safe read-only commands that can be executed without restrictions
-        self.safe_prefixes = [
-            "ls", "cat", "head", "tail", "grep", "find", "wc", "echo",
-            "ps", "top", "htop", "df", "du", "free", "uptime", "whoami",
-            "pwd", "which", "whereis", "file", "stat", "date",
-            "docker ps", "docker images", "docker inspect", "docker logs", "docker stats",
-            "kubectl get", "kubectl describe", "kubectl logs", "kubectl top",
-            "git status", "git log", "git diff", "git branch", "git show",
-            "systemctl status", "systemctl list-units", "journalctl",
-            "aws s3 ls", "aws ec2 describe-instances", "gcloud compute instances list",
-            "terraform show", "terraform plan", "helm list", "helm status",
-            "curl -s", "curl -L", "curl -I", "curl --head", "curl http",
-            "wget --spider", "ping", "dig", "nslookup", "netstat", "ss",
-            "env", "printenv", "uname", "hostname"
-        ]
-        
-        # Dangerous commands that should never be executed
-        self.dangerous_patterns = [
-            "rm -rf", "rm -fr", "rm -r", "rm -f",
-            "dd if=", "mkfs", "fdisk", "parted",
-            "> /dev/", "shutdown", "reboot", "halt", "poweroff",
-            "kill -9", "killall", "pkill -9",
-            "chmod 777", "chown -R", "chmod -R 777",
-            ":(){ :|:& };:",  # Fork bomb
-            "mv /", "cp -r /", "rsync -a /",
-            "curl -X POST", "curl -X PUT", "curl -X DELETE", "curl -X PATCH",
-            "wget -O", "wget --post", "wget --delete",
-            "docker rm", "docker rmi", "docker system prune",
-            "kubectl delete", "kubectl apply", "kubectl create",
-            "git push --force", "git push -f", "git reset --hard", "git clean -fd",
-            "npm install -g", "pip install", "apt install", "yum install", "brew install",
-            "systemctl stop", "systemctl restart", "systemctl disable",
-            "iptables", "ufw", "firewall-cmd",
-            "crontab -r", "at ", "batch",
-            "sudo su", "su -", "sudo -i"
-        ]
-        
-        # Moderate commands that need confirmation but aren't dangerous
-        self.moderate_patterns = [
-            "git push",  # Safe git push (not force)
-            "curl -X",   # Other HTTP methods
-            "wget "      # Basic wget downloads
-        ]
-    
-    def description(self):
-        return dedent("""
-        Execute shell commands with safety checks and user confirmation.
+# Written flush-left so it needs no dedent; the schema is built from this on registration
+RUN_COMMAND_DESCRIPTION = """
+Execute shell commands with safety checks and user confirmation.
 
-        ### When to Use
-        - Running system administration commands (ps, df, systemctl, etc.)
-        - Managing Docker containers and images
-        - Managing Kubernetes resources (kubectl)
-        - Git operations (status, log, diff, branch)
-        - Cloud CLI operations (aws, gcloud, az)
-        - Running custom scripts or commands not available as dedicated tools
-        - Checking service status, logs, and diagnostics
+### When to Use
+- Running system administration commands (ps, df, systemctl, etc.)
+- Managing Docker containers and images
+- Managing Kubernetes resources (kubectl)
+- Git operations (status, log, diff, branch)
+- Cloud CLI operations (aws, gcloud, az)
+- Running custom scripts or commands not available as dedicated tools
+- Checking service status, logs, and diagnostics
 
-        ### When NOT to Use
-        - Use `read_file` instead of `cat file.txt`
-        - Use `glob` instead of `find` commands for simple file searches
-        - Use `grep` tool instead of `grep` command for text searches
-        - Use `list_file` instead of `ls` for directory listings
-        - Dangerous commands will be automatically blocked
+### When NOT to Use
+- Use `read_file` instead of `cat file.txt`
+- Use `glob` instead of `find` commands for simple file searches
+- Use `grep` tool instead of `grep` command for text searches
+- Use `list_file` instead of `ls` for directory listings
+- Dangerous commands will be automatically blocked
 
-        ### Parameters
-        - `command`: Shell command to execute (required). Examples: "docker ps", "kubectl get pods"
-        - `timeout`: Maximum execution time in seconds (optional, default: 30)
+### Parameters
+- `command`: Shell command to execute (required). Examples: "docker ps", "kubectl get pods"
+- `timeout`: Maximum execution time in seconds (optional, default: 30)
 
-        ### Output Format
-        Returns JSON with structure:
-        ```json
-        {
-            "success": true/false,
-            "command": "the executed command",
-            "return_code": 0,
-            "stdout": "standard output content",
-            "stderr": "error output content",
-            "execution_time": 1.23,
-            "risk_level": "safe|moderate|dangerous",
-            "stdout_truncated": false,
-            "stderr_truncated": false
-        }
-        ```
-        Or on user rejection:
-        ```json
-        {
-            "success": false,
-            "error": "User rejected the command",
-            "command": "..."
-        }
-        ```
+### Output Format
+Returns JSON with structure:
+```json
+{
+    "success": true/false,
+    "command": "the executed command",
+    "return_code": 0,
+    "stdout": "standard output content",
+    "stderr": "error output content",
+    "execution_time": 1.23,
+    "risk_level": "safe|moderate|dangerous",
+    "stdout_truncated": false,
+    "stderr_truncated": false
+}
+```
+Or on user rejection:
+```json
+{
+    "success": false,
+    "error": "User rejected the command",
+    "command": "..."
+}
+```
 
-        ### Examples
+### Examples
 
-        **List Docker containers (safe - auto-executed):**
-        Input: {"command": "docker ps -a"}
-        Output: {
-            "success": true,
-            "command": "docker ps -a",
-            "return_code": 0,
-            "stdout": "CONTAINER ID   IMAGE     STATUS   NAMES\\nabc123   nginx     Up       web",
-            "stderr": "",
-            "execution_time": 0.45,
-            "risk_level": "safe"
-        }
+**List Docker containers (safe - auto-executed):**
+Input: {"command": "docker ps -a"}
+Output: {
+    "success": true,
+    "command": "docker ps -a",
+    "return_code": 0,
+    "stdout": "CONTAINER ID   IMAGE     STATUS   NAMES\\nabc123   nginx     Up       web",
+    "stderr": "",
+    "execution_time": 0.45,
+    "risk_level": "safe"
+}
 
-        **Check service status (safe - auto-executed):**
-        Input: {"command": "systemctl status nginx"}
-        Output: {
-            "success": true,
-            "command": "systemctl status nginx",
-            "return_code": 0,
-            "stdout": "● nginx.service - A high performance web server\\n   Loaded: loaded...",
-            "risk_level": "safe"
-        }
+**Check service status (safe - auto-executed):**
+Input: {"command": "systemctl status nginx"}
+Output: {
+    "success": true,
+    "command": "systemctl status nginx",
+    "return_code": 0,
+    "stdout": "● nginx.service - A high performance web server\\n   Loaded: loaded...",
+    "risk_level": "safe"
+}
 
-        **Get Kubernetes pods (safe - auto-executed):**
-        Input: {"command": "kubectl get pods -n production"}
-        Output: {
-            "success": true,
-            "command": "kubectl get pods -n production",
-            "return_code": 0,
-            "stdout": "NAME              READY   STATUS    RESTARTS   AGE\\napp-pod-7d8f   1/1     Running   0          2d",
-            "risk_level": "safe"
-        }
+**Get Kubernetes pods (safe - auto-executed):**
+Input: {"command": "kubectl get pods -n production"}
+Output: {
+    "success": true,
+    "command": "kubectl get pods -n production",
+    "return_code": 0,
+    "stdout": "NAME              READY   STATUS    RESTARTS   AGE\\napp-pod-7d8f   1/1     Running   0          2d",
+    "risk_level": "safe"
+}
 
-        **User rejects command:**
-        Input: {"command": "git push origin main"}
-        Output: {
-            "success": false,
-            "error": "User rejected the command",
-            "command": "git push origin main"
-        }
+**User rejects command:**
+Input: {"command": "git push origin main"}
+Output: {
+    "success": false,
+    "error": "User rejected the command",
+    "command": "git push origin main"
+}
 
-        **Dangerous command blocked:**
-        Input: {"command": "rm -rf /important/data"}
-        Output: {
-            "success": false,
-            "error": "Command rejected: This command is classified as dangerous and cannot be executed.",
-            "risk_level": "dangerous",
-            "command": "rm -rf /important/data",
-            "suggestion": "Please run this command manually if you're certain it's safe."
-        }
+**Dangerous command blocked:**
+Input: {"command": "rm -rf /important/data"}
+Output: {
+    "success": false,
+    "error": "Command rejected: This command is classified as dangerous and cannot be executed.",
+    "risk_level": "dangerous",
+    "command": "rm -rf /important/data",
+    "suggestion": "Please run this command manually if you're certain it's safe."
+}
 
-        ### Safety Classification
+### Safety Classification
 
-        **Safe Commands** (executed after confirmation):
-        - Read-only commands: ls, cat, ps, df, docker ps, kubectl get, git status/log/diff
-        - Status checks: systemctl status, service status, top, htop
-        - Network diagnostics: ping, curl, wget, dig, nslookup
+**Safe Commands** (executed after confirmation):
+- Read-only commands: ls, cat, ps, df, docker ps, kubectl get, git status/log/diff
+- Status checks: systemctl status, service status, top, htop
+- Network diagnostics: ping, curl, wget, dig, nslookup
 
-        **Moderate Commands** (require confirmation):
-        - git push, curl with -X, wget downloads
-        - Any command not in safe list
+**Moderate Commands** (require confirmation):
+- git push, curl with -X, wget downloads
+- Any command not in safe list
 
-        **Dangerous Commands** (blocked):
-        - Destructive: rm -rf, dd, mkfs, shutdown, reboot
-        - System modifications: chmod 777, chown -R, iptables
-        - Force operations: git push --force, kubectl delete, docker rmi
+**Dangerous Commands** (blocked):
+- Destructive: rm -rf, dd, mkfs, shutdown, reboot
+- System modifications: chmod 777, chown -R, iptables
+- Force operations: git push --force, kubectl delete, docker rmi
 
-        ### Important Notes
-        - ALL commands require user confirmation before execution
-        - Commands timeout after 30 seconds by default
-        - Output is truncated at 10KB for stdout and stderr
-        - Commands run in the user's active shell environment
-        - If user rejects a command, DO NOT retry immediately
-        - """)
+### Important Notes
+- ALL commands require user confirmation before execution
+- Commands timeout after 30 seconds by default
+- Output is truncated at 10KB for stdout and stderr
+- Commands run in the user's active shell environment
+- If user rejects a command, DO NOT retry immediately
+- """
+
+
+def _compile_patterns(patterns):
+    """
+    Build a matcher for a pattern list, lowercasing each pattern once here rather than per check.
+    Patterns are bucketed by first character, e.g. r(?:m -rf|m -fr|...)|d(?:d if=|...), so at each
+    position the engine tries one branch per leading character instead of every pattern.
+    """
+    buckets = {}
+    for pattern in patterns:
+        pattern = pattern.lower()
+        buckets.setdefault(pattern[0], []).append(re.escape(pattern[1:]))
+    return re.compile("|".join(
+        f"{re.escape(first)}(?:{'|'.join(rests)})" for first, rests in buckets.items()
+    ))
+
+
+class CommandExecutor(ToolSchema):
+    """
+    Executes shell commands with safety constraints.
+    Classifies commands by risk level and enforces execution policies.
+    """
+    # Prompts the user for confirmation, so it never runs alongside other tools
+    # and needs the terminal to itself while it runs
+    sequential = True
+    interactive = True
+    
+    # Risk tables and their compiled matchers live on the class, so they are built once per process
+    
+    # Safe read-only commands that can be executed without restrictions
+    SAFE_PREFIXES = (
+        "ls", "cat", "head", "tail", "grep", "find", "wc", "echo",
+        "ps", "top", "htop", "df", "du", "free", "uptime", "whoami",
+        "pwd", "which", "whereis", "file", "stat", "date",
+        "docker ps", "docker images", "docker inspect", "docker logs", "docker stats",
+        "kubectl get", "kubectl describe", "kubectl logs", "kubectl top",
+        "git status", "git log", "git diff", "git branch", "git show",
+        "systemctl status", "systemctl list-units", "journalctl",
+        "aws s3 ls", "aws ec2 describe-instances", "gcloud compute instances list",
+        "terraform show", "terraform plan", "helm list", "helm status",
+        "curl -s", "curl -L", "curl -I", "curl --head", "curl http",
+        "wget --spider", "ping", "dig", "nslookup", "netstat", "ss",
+        "env", "printenv", "uname", "hostname"
+    )
+    
+    # Dangerous commands that should never be executed
+    DANGEROUS_PATTERNS = (
+        "rm -rf", "rm -fr", "rm -r", "rm -f",
+        "dd if=", "mkfs", "fdisk", "parted",
+        "> /dev/", "shutdown", "reboot", "halt", "poweroff",
+        "kill -9", "killall", "pkill -9",
+        "chmod 777", "chown -R", "chmod -R 777",
+        ":(){ :|:& };:",  # Fork bomb
+        "mv /", "cp -r /", "rsync -a /",
+        "curl -X POST", "curl -X PUT", "curl -X DELETE", "curl -X PATCH",
+        "wget -O", "wget --post", "wget --delete",
+        "docker rm", "docker rmi", "docker system prune",
+        "kubectl delete", "kubectl apply", "kubectl create",
+        "git push --force", "git push -f", "git reset --hard", "git clean -fd",
+        "npm install -g", "pip install", "apt install", "yum install", "brew install",
+        "systemctl stop", "systemctl restart", "systemctl disable",
+        "iptables", "ufw", "firewall-cmd",
+        "crontab -r", "at ", "batch",
+        "sudo su", "su -", "sudo -i"
+    )
+    
+    # Moderate commands that need confirmation but aren't dangerous
+    MODERATE_PATTERNS = (
+        "git push",  # Safe git push (not force)
+        "curl -X",   # Other HTTP methods
+        "wget "      # Basic wget downloads
+    )
+
+    # Each list becomes one alternation so a command is scanned once per level in C,
+    # instead of one Python-level substring test per pattern
+    _dangerous_re = _compile_patterns(DANGEROUS_PATTERNS)
+    _moderate_re = _compile_patterns(MODERATE_PATTERNS)
+    # Safe prefixes use the same alternation with an anchored match(), which stops as soon
+    # as no prefix can still match the start of the command
+    _safe_re = _compile_patterns(SAFE_PREFIXES)
+    
+    def __init__(self, console=None, auto_approve_safe: bool = None, default_non_interactive: bool = False):
+        self.name = "run_command"
+        if console is None:
+            from rich.console import Console
+            console = Console()
+        self.console = console
+        if auto_approve_safe is None:
+            auto_approve_safe = ConfigManager().auto_approve_safe
+        self.auto_approve_safe = auto_approve_safe
+        # Answer used when there is no terminal to ask on (piped stdin, CI)
+        self.default_non_interactive = default_non_interactive
+    
+    def description(self):
+        return RUN_COMMAND_DESCRIPTION
     
     def json_schema(self):
         return {
@@ -215,34 +288,133 @@ class CommandExecutor(ToolSchema):
         Classify command risk level with context-aware detection.
         Returns: 'safe', 'moderate', or 'dangerous'
         """
+        # One lower() here is much cheaper than compiling the tables with re.IGNORECASE,
+        # which makes the engine fold case on every character it compares
         command_lower = command.lower().strip()
         
         # Check for dangerous patterns first
-        for pattern in self.dangerous_patterns:
-            if pattern.lower() in command_lower:
-                return "dangerous"
+        if self._dangerous_re.search(command_lower):
+            return "dangerous"
         
         # Check for moderate patterns (commands that need confirmation but aren't dangerous)
-        for pattern in self.moderate_patterns:
-            if pattern.lower() in command_lower:
-                return "moderate"
+        if self._moderate_re.search(command_lower):
+            return "moderate"
         
         # Check for safe prefixes
-        for prefix in self.safe_prefixes:
-            if command_lower.startswith(prefix.lower()):
-                return "safe"
+        if self._safe_re.match(command_lower):
+            return "safe"
         
         # Default to moderate for unknown commands
         return "moderate"
     
+    @staticmethod
+    async def _read_capped(stream):
+        """
+        Drain a pipe to EOF so the child never blocks on a full buffer, but keep only the
+        first MAX_CAPTURE_BYTES. Returns the kept bytes and whether anything was dropped.
+        """
+        kept = bytearray()
+        dropped = False
+        while chunk := await stream.read(READ_CHUNK_SIZE):
+            room = MAX_CAPTURE_BYTES - len(kept)
+            if room > 0:
+                kept += chunk[:room]
+            dropped = dropped or len(chunk) > room
+        return bytes(kept), dropped
+    
+    def _print_command(self, command: str):
+        """Show the command about to run with one plain write; a fixed two-style line needs no Rich render."""
+        shown = command.translate(BANNER_CONTROL_CHARS)
+        if self.console.is_terminal and self.console.color_system:
+            line = COMMAND_BANNER.format(shown)
+        else:
+            line = f"Command to execute: {shown}\n"
+        self.console.file.write(line)
+        self.console.file.flush()
+    
+    @staticmethod
+    def _kill_tree(proc):
+        """SIGKILL the command's whole process group, or just the shell where there are none."""
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+        except ProcessLookupError:
+            pass
+    
+    @staticmethod
+    def _foreground_tty():
+        """stdin's fd when it is a terminal whose foreground process group is ours, else None."""
+        if not hasattr(os, "tcsetpgrp") or sys.stdin is None:
+            return None
+        try:
+            fd = sys.stdin.fileno()
+            if os.isatty(fd) and os.tcgetpgrp(fd) == os.getpgrp():
+                return fd
+        except (OSError, ValueError):
+            pass
+        return None
+
+    @staticmethod
+    def _give_terminal(fd, pgid):
+        """Make the command's process group the terminal's foreground group, as a shell does."""
+        try:
+            os.tcsetpgrp(fd, pgid)
+            # It may have read the terminal before the handover and been stopped by SIGTTIN
+            os.killpg(pgid, signal.SIGCONT)
+        except OSError:
+            # Already exited
+            pass
+
+    @staticmethod
+    def _take_terminal(fd):
+        """Move the terminal's foreground back to our process group."""
+        # From the background, tcsetpgrp raises SIGTTOU (which stops us) unless it is blocked
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTTOU})
+        try:
+            os.tcsetpgrp(fd, os.getpgrp())
+        except OSError:
+            pass
+        finally:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGTTOU})
+
     def _is_safe_command(self, command: str) -> bool:
         """Check if command is safe to execute."""
         risk = self._classify_risk(command)
         return risk == "safe"
     
+    def _can_auto_approve(self, command: str, risk_level: str) -> bool:
+        """
+        Only single, plain commands from AUTO_APPROVE_COMMANDS, without any of their rejected
+        options, may run without asking, and only when enabled.
+        """
+        if not self.auto_approve_safe or risk_level != "safe" or SHELL_CONTROL.search(command):
+            return False
+        try:
+            words = shlex.split(command)
+        except ValueError:
+            return False
+        for length in (2, 1):
+            rejected = AUTO_APPROVE_COMMANDS.get(tuple(words[:length]))
+            if rejected is not None:
+                break
+        else:
+            return False
+        return not any(
+            word == option or word.startswith(option + "=")
+            for word in words[length:]
+            for option in rejected
+        )
+    
     def run(self, command: str, timeout: int = 30):
+        """Blocking wrapper around arun() for callers that are not inside an event loop."""
+        return asyncio.run(self.arun(command, timeout))
+    
+    async def arun(self, command: str, timeout: int = 30):
         """
         Execute a shell command with safety checks.
+        The child is awaited rather than waited on, so the event loop is never blocked.
         
         Args:
             command: Shell command to execute
@@ -255,76 +427,115 @@ class CommandExecutor(ToolSchema):
         risk_level = self._classify_risk(command)
         
         if risk_level == "dangerous":
-            return json.dumps({
+            return json_dumps({
                 "success": False,
                 "error": "Command rejected: This command is classified as dangerous and cannot be executed.",
                 "risk_level": "dangerous",
                 "command": command,
                 "suggestion": "Please run this command manually if you're certain it's safe."
-            }, indent=2)
+            })
 
-        THEME_WARNING = "yellow"
-        self.console.print(Text.assemble(
-            ("Command to execute: ", "bold white"),
-            (command, "bold bright_cyan")
-        ))
-        confirm_text = Text("Execute this command?", style="bold " + THEME_WARNING)
-        
-        should_execute = Confirm.ask(confirm_text)
+        if self._can_auto_approve(command, risk_level):
+            # Opted in: plain safe commands skip the Rich prompt entirely
+            should_execute = True
+        elif sys.stdin is None or not sys.stdin.isatty():
+            # Nobody can answer a prompt, so don't build one or block on stdin
+            if not self.default_non_interactive:
+                return json_dumps({
+                    "success": False,
+                    "error": "No terminal available to confirm the command",
+                    "command": command
+                })
+            should_execute = True
+        else:
+            # Only pay for Rich's prompt machinery when a prompt is actually shown
+            from rich.text import Text
+            from rich.prompt import Confirm
+
+            THEME_WARNING = "yellow"
+            self._print_command(command)
+            confirm_text = Text("Execute this command?", style="bold " + THEME_WARNING)
+            
+            should_execute = Confirm.ask(confirm_text)
 
         if should_execute:
             try:
                 start_time = time.time()
                 
+                # With a terminal, the command gets it (stdin and the foreground) the way a shell
+                # would hand it over, so sudo, ssh and credential prompts still work; without
+                # one it gets no stdin rather than competing for ours
+                tty_fd = self._foreground_tty()
                 with self.console.status(f"[bold green]Running: {command}"):
-                    result = subprocess.run(
+                    # A process group of its own lets the shell and everything it spawns be
+                    # killed together while staying in the terminal's session
+                    proc = await asyncio.create_subprocess_shell(
                         command,
-                        shell=True,
-                        capture_output=True,
-                        text=True,
-                        timeout=timeout
+                        stdin=None if tty_fd is not None else asyncio.subprocess.DEVNULL,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                        process_group=0
                     )
+                    try:
+                        if tty_fd is not None:
+                            self._give_terminal(tty_fd, proc.pid)
+                        (raw_stdout, stdout_dropped), (raw_stderr, stderr_dropped), _ = await asyncio.wait_for(
+                            asyncio.gather(
+                                self._read_capped(proc.stdout),
+                                self._read_capped(proc.stderr),
+                                proc.wait()
+                            ),
+                            timeout
+                        )
+                    except BaseException:
+                        # Timeouts and cancellation must not leave any of it running
+                        self._kill_tree(proc)
+                        await proc.wait()
+                        raise
+                    finally:
+                        if tty_fd is not None:
+                            self._take_terminal(tty_fd)
                 
                 execution_time = time.time() - start_time
+                full_stdout = raw_stdout.decode(errors="replace")
+                full_stderr = raw_stderr.decode(errors="replace")
                 
-                # Limit output size to 10KB
-                max_output_size = 10 * 1024  # 10KB
-                stdout = result.stdout[:max_output_size]
-                stderr = result.stderr[:max_output_size]
+                stdout = full_stdout[:MAX_OUTPUT_SIZE]
+                stderr = full_stderr[:MAX_OUTPUT_SIZE]
                 
-                stdout_truncated = len(result.stdout) > max_output_size
-                stderr_truncated = len(result.stderr) > max_output_size
+                stdout_truncated = stdout_dropped or len(full_stdout) > MAX_OUTPUT_SIZE
+                stderr_truncated = stderr_dropped or len(full_stderr) > MAX_OUTPUT_SIZE
                 
-                return json.dumps({
-                    "success": result.returncode == 0,
+                return json_dumps({
+                    "success": proc.returncode == 0,
                     "command": command,
-                    "return_code": result.returncode,
+                    "return_code": proc.returncode,
                     "stdout": stdout.strip() if stdout else "",
                     "stderr": stderr.strip() if stderr else "",
                     "execution_time": round(execution_time, 2),
                     "stdout_truncated": stdout_truncated,
                     "stderr_truncated": stderr_truncated,
                     "risk_level": risk_level
-                }, indent=2)
+                })
                 
-            except subprocess.TimeoutExpired:
-                return json.dumps({
+            except asyncio.TimeoutError:
+                return json_dumps({
                     "success": False,
                     "error": f"Command timed out after {timeout} seconds",
                     "command": command,
                     "timeout": timeout
-                }, indent=2)
+                })
                 
             except Exception as e:
-                return json.dumps({
+                return json_dumps({
                     "success": False,
                     "error": f"Execution failed: {str(e)}",
                     "command": command
-                }, indent=2)
+                })
 
         else:
-            return json.dumps({
+            return json_dumps({
                 "success": False,
                 "error": "User rejected the command",
                 "command": command
-            }, indent=2)
\ No newline at end of file
+            })
\ No newline at end of file
@@ -2,23 +2,31 @@ import os
 import platform
 import subprocess
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from .schema import ToolSchema
-from textwrap import dedent
+from ..serialization import dumps as json_dumps
+
+# The OS cannot change under a running process, so read it once at import
+OS_NAME = platform.system()
+OS_RELEASE = platform.release()
+
+# Written flush-left so it needs no dedent; the schema is built from this on registration
+ENV_DETECTOR_DESCRIPTION = """
+Gathers comprehensive details about the current execution environment.
+Includes OS version, active shell, current working directory, and availability of key DevOps tools (git, docker, kubectl, etc.).
+
+Use this at the start of a task to:
+- Determine which commands are compatible with the OS.
+- Check if necessary CLI tools are installed.
+- Understand the current project context (e.g., active git branch).
+"""
 
 class EnvironmentDetector(ToolSchema):
     def __init__(self):
         self.name = "env_detector"
     
     def description(self):
-        return dedent("""
-        Gathers comprehensive details about the current execution environment.
-        Includes OS version, active shell, current working directory, and availability of key DevOps tools (git, docker, kubectl, etc.).
-        
-        Use this at the start of a task to:
-        - Determine which commands are compatible with the OS.
-        - Check if necessary CLI tools are installed.
-        - Understand the current project context (e.g., active git branch).
-        """)
+        return ENV_DETECTOR_DESCRIPTION
     
     def json_schema(self):
         return {
@@ -37,41 +45,58 @@ class EnvironmentDetector(ToolSchema):
     def _check_tool(self, tool_name):
         return shutil.which(tool_name) is not None
 
-    def run(self):
+    def detect_base(self, cwd):
+        """OS, shell, cwd and installed tools: what only changes when tools are (un)installed."""
         env_info = {
-            "os": platform.system(),
-            "os_release": platform.release(),
+            "os": OS_NAME,
+            "os_release": OS_RELEASE,
             "shell": os.environ.get("SHELL", "unknown"),
-            "cwd": os.getcwd(),
+            "cwd": cwd,
             "installed_tools": {},
         }
 
-        tools_to_check = [
+        tools_to_check = (
             "git", "docker", "kubectl", "terraform", "aws", 
             "gcloud", "helm", "brew", "apt", "python", "node"
-        ]
-        for tool in tools_to_check:
-            env_info["installed_tools"][tool] = self._check_tool(tool)
+        )
+        # Each lookup stats its way along $PATH, so run them side by side
+        with ThreadPoolExecutor(max_workers=len(tools_to_check)) as executor:
+            found = executor.map(self._check_tool, tools_to_check)
+            env_info["installed_tools"] = dict(zip(tools_to_check, found))
+        return env_info
 
-        if env_info["installed_tools"]["git"]:
+    def detect_git(self, base):
+        """The current branch and dirty state, which any checkout or edit can change."""
+        git_info = {}
+        if base["installed_tools"]["git"]:
             try:
-                branch = subprocess.check_output(
-                    ["git", "branch", "--show-current"], 
+                # One porcelain v2 call reports both the branch header and any changes
+                output = subprocess.check_output(
+                    ["git", "status", "--porcelain=v2", "--branch"], 
                     stderr=subprocess.DEVNULL, 
                     text=True
-                ).strip()
-                if branch:
-                    env_info["git_branch"] = branch
+                )
+                branch = ""
+                dirty = False
+                for line in output.splitlines():
+                    if line.startswith("# branch.head "):
+                        branch = line[len("# branch.head "):]
+                    elif not line.startswith("#"):
+                        dirty = True
+                        break
+                # A detached HEAD has no current branch, as with `git branch --show-current`
+                if branch and branch != "(detached)":
+                    git_info["git_branch"] = branch
                     
-                status = subprocess.check_output(
-                    ["git", "status", "--short"], 
-                    stderr=subprocess.DEVNULL, 
-                    text=True
-                ).strip()
-                if status:
-                    env_info["git_status"] = "dirty" if status else "clean"
+                if dirty:
+                    git_info["git_status"] = "dirty"
             except Exception:
                 pass
+        return git_info
 
-        import json
-        return json.dumps(env_info, indent=2)
+    def run(self):
+        # Detected afresh on every call: the model asks for this when it wants current state,
+        # e.g. right after a command switched branches
+        env_info = self.detect_base(os.getcwd())
+        env_info.update(self.detect_git(env_info))
+        return json_dumps(env_info)
@@ -1,71 +1,134 @@
+import os
+import re
 import glob
+import fnmatch
+from functools import lru_cache
 from .schema import ToolSchema
-from textwrap import dedent
+
+
+def _split_recursive(pattern):
+    """
+    Split '<literal dir>/**/<name pattern>' into (literal dir, name pattern).
+    Returns None for any other shape, which glob.glob handles instead.
+    """
+    head, name = os.path.split(pattern)
+    head, middle = os.path.split(head)
+    if middle != "**" or not name or not glob.has_magic(name) or glob.has_magic(head):
+        return None
+    return head, name
+
+
+@lru_cache(maxsize=256)
+def _compile_name_pattern(name_pattern):
+    """Translate a name pattern once; agents tend to repeat the same few (e.g. '*.py')."""
+    return re.compile(fnmatch.translate(os.path.normcase(name_pattern))).match
+
+
+def _iglob_recursive(root, name_pattern, include_hidden=False):
+    """
+    Yield paths under root whose name matches name_pattern, in the same order as
+    glob.glob(f"{root}/**/{name_pattern}", recursive=True, include_hidden=include_hidden).
+    glob lists every directory twice for this shape (once to find subdirectories, once to
+    match names); this lists each one a single time, matching names and collecting
+    subdirectories in one pass.
+    """
+    match = _compile_name_pattern(name_pattern)
+    # A leading '.' in the name pattern matches hidden names, but only include_hidden
+    # descends into hidden directories such as .git or .venv
+    match_hidden = include_hidden or name_pattern.startswith(".")
+    # Explicit stack of directories still to list; popping from the end walks depth-first
+    # in scandir order, like glob's recursive generator
+    stack = [root]
+    while stack:
+        dirname = stack.pop()
+        try:
+            with os.scandir(dirname or os.curdir) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+            hidden = name.startswith(".")
+            if (match_hidden or not hidden) and match(os.path.normcase(name)):
+                yield os.path.join(dirname, name)
+            try:
+                # Follows symlinks as glob does; needs no stat for regular entries
+                if (include_hidden or not hidden) and entry.is_dir():
+                    subdirs.append(os.path.join(dirname, name))
+            except OSError:
+                pass
+        stack.extend(reversed(subdirs))
+
+
+GLOB_DESCRIPTION = """
+Finds files matching a glob pattern with support for wildcards.
+
+### When to Use
+- Finding all files of a certain type (e.g., all Python files)
+- Locating files by naming pattern across directories
+- Discovering configuration files in a project
+- Finding test files, logs, or assets
+
+### When NOT to Use
+- Use `grep` to search within file contents
+- Use `read_file` to inspect specific files
+- Use `run_command "find ..."` only if glob can't handle your pattern
+
+### Parameters
+- `pattern`: Glob pattern with wildcards (required). Supports:
+  - `*` matches any files in one directory
+  - `**` matches recursively across directories
+  - `?` matches single characters
+  - `[abc]` matches character sets
+  Use absolute paths for best results.
+- `include_hidden`: Also match hidden files and recurse into hidden directories like `.git` (optional, default false)
+
+### Output Format
+- Success: "Found {count} matches for pattern '{pattern}':\\n{file_list}"
+- No results: "No files found matching pattern: {pattern}"
+
+### Examples
+
+**Find all Python files recursively:**
+Input: {"pattern": "/Users/project/**/*.py"}
+Output: "Found 5 matches for pattern '/Users/project/**/*.py':
+/Users/project/src/main.py
+/Users/project/src/utils.py
+/Users/project/tests/test_main.py
+/Users/project/tests/test_utils.py
+/Users/project/setup.py"
+
+**Find all YAML files in current directory:**
+Input: {"pattern": "/Users/project/*.yml"}
+Output: "Found 2 matches for pattern '/Users/project/*.yml':
+/Users/project/docker-compose.yml
+/Users/project/config.yml"
+
+**Find all test files:**
+Input: {"pattern": "/Users/project/**/*test*.py"}
+Output: "Found 3 matches for pattern '/Users/project/**/*test*.py':
+/Users/project/tests/test_api.py
+/Users/project/tests/test_db.py
+/Users/project/src/integrationtest.py"
+
+**No matches found:**
+Input: {"pattern": "/Users/project/**/*.go"}
+Output: "No files found matching pattern: /Users/project/**/*.go"
+
+### Tips
+- Always use absolute paths (starting with /) for reliability
+- Use `**` for recursive searches (most common case)
+- Chain with `read_file` to inspect found files
+- """
+
 
 class Glob(ToolSchema):
     def __init__(self):
         self.name = "glob"
     
     def description(self):
-        return dedent("""
-        Finds files matching a glob pattern with support for wildcards.
-
-        ### When to Use
-        - Finding all files of a certain type (e.g., all Python files)
-        - Locating files by naming pattern across directories
-        - Discovering configuration files in a project
-        - Finding test files, logs, or assets
-
-        ### When NOT to Use
-        - Use `grep` to search within file contents
-        - Use `read_file` to inspect specific files
-        - Use `run_command "find ..."` only if glob can't handle your pattern
-
-        ### Parameters
-        - `pattern`: Glob pattern with wildcards (required). Supports:
-          - `*` matches any files in one directory
-          - `**` matches recursively across directories
-          - `?` matches single characters
-          - `[abc]` matches character sets
-          Use absolute paths for best results.
-
-        ### Output Format
-        - Success: "Found {count} matches for pattern '{pattern}':\\n{file_list}"
-        - No results: "No files found matching pattern: {pattern}"
-
-        ### Examples
-
-        **Find all Python files recursively:**
-        Input: {"pattern": "/Users/project/**/*.py"}
-        Output: "Found 5 matches for pattern '/Users/project/**/*.py':
-        /Users/project/src/main.py
-        /Users/project/src/utils.py
-        /Users/project/tests/test_main.py
-        /Users/project/tests/test_utils.py
-        /Users/project/setup.py"
-
-        **Find all YAML files in current directory:**
-        Input: {"pattern": "/Users/project/*.yml"}
-        Output: "Found 2 matches for pattern '/Users/project/*.yml':
-        /Users/project/docker-compose.yml
-        /Users/project/config.yml"
-
-        **Find all test files:**
-        Input: {"pattern": "/Users/project/**/*test*.py"}
-        Output: "Found 3 matches for pattern '/Users/project/**/*test*.py':
-        /Users/project/tests/test_api.py
-        /Users/project/tests/test_db.py
-        /Users/project/src/integrationtest.py"
-
-        **No matches found:**
-        Input: {"pattern": "/Users/project/**/*.go"}
-        Output: "No files found matching pattern: /Users/project/**/*.go"
-
-        ### Tips
-        - Always use absolute paths (starting with /) for reliability
-        - Use `**` for recursive searches (most common case)
-        - Chain with `read_file` to inspect found files
-        - """)
+        return GLOB_DESCRIPTION
     
     def json_schema(self):
         return {
@@ -79,6 +142,10 @@ class Glob(ToolSchema):
                         "pattern": {
                             "type": "string",
                             "description": "The glob pattern to match files against, e.g., '/path/to/**/*.py'"
+                        },
+                        "include_hidden": {
+                            "type": "boolean",
+                            "description": "Also match hidden files and descend into hidden directories such as .git (default: false)"
                         }
                     },
                     "required": ["pattern"]
@@ -86,10 +153,15 @@ class Glob(ToolSchema):
             }
         }
     
-    def run(self, pattern: str):
+    def run(self, pattern: str, include_hidden: bool = False):
         try:
-            # Use recursive=True for ** patterns
-            files = glob.glob(pattern, recursive=True)
+            split = _split_recursive(pattern)
+            if split is not None:
+                # The common '<dir>/**/<name pattern>' shape gets a single-pass walk
+                files = list(_iglob_recursive(*split, include_hidden=include_hidden))
+            else:
+                # Use recursive=True for ** patterns
+                files = glob.glob(pattern, recursive=True, include_hidden=include_hidden)
             if not files:
                 return f"No files found matching pattern: {pattern}"
             
@@ -1,81 +1,110 @@
 import subprocess
 import os
+import stat
+import shutil
+import tempfile
 from .schema import ToolSchema
-from textwrap import dedent
+
+# ripgrep is much faster on large trees and understands the "(?i)" flag the description
+# promises; plain grep is the fallback
+RG_PATH = shutil.which("rg")
+
+OUTPUT_LIMIT = 10000  # characters
+# Enough UTF-8 bytes for OUTPUT_LIMIT characters; the search is stopped once this much is read
+READ_LIMIT = OUTPUT_LIMIT * 4
+
+
+def _search_command(pattern, directory_path):
+    """The search argv; -e keeps a pattern that starts with '-' from being read as an option."""
+    if RG_PATH:
+        # Same scope as `grep -rI`: hidden and git-ignored files included, binary files skipped
+        return [
+            RG_PATH, "--no-config", "-n", "--no-heading", "--with-filename",
+            "--hidden", "--no-ignore", "-e", pattern, directory_path
+        ]
+    # -r: recursive
+    # -n: line numbers
+    # -E: extended regex
+    # -I: ignore binary files
+    return ["grep", "-rnEI", "-e", pattern, directory_path]
+
+
+GREP_DESCRIPTION = """
+Perform recursive text search for a pattern across files in a directory.
+
+### When to Use
+- Finding where a function, variable, or class is defined
+- Searching for specific code usage or patterns across a project
+- Locating configuration values or settings
+- Finding all occurrences of a string/text in multiple files
+
+### When NOT to Use
+- Use `glob` to find files by name/pattern (not content)
+- Use `read_file` to inspect a specific file's full contents
+- Use `run_command "grep ..."` only if you need special grep flags
+
+### Parameters
+- `pattern`: The text or regex pattern to search for (required). Can be:
+  - Literal string: "function_name"
+  - Regex: "def \\w+\\(", "import .*os", "TODO|FIXME"
+- `directory_path`: Absolute path to search directory (required). Example: "/Users/project/src"
+
+### Output Format
+- Success: "Grep results for '{pattern}' in '{dir}':\\n{file}:{line}:{content}"
+- No matches: "No matches found for pattern '{pattern}' in '{dir}'."
+- Error: "Error executing grep: {error_details}"
+
+### Examples
+
+**Find function definition:**
+Input: {"pattern": "def main", "directory_path": "/Users/project/src"}
+Output: "Grep results for 'def main' in '/Users/project/src':
+/Users/project/src/main.py:15:def main():
+/Users/project/src/app.py:8:    def main(self):"
+
+**Find import statements:**
+Input: {"pattern": "import os", "directory_path": "/Users/project"}
+Output: "Grep results for 'import os' in '/Users/project':
+/Users/project/src/utils.py:1:import os
+/Users/project/src/helpers.py:3:import os
+/Users/project/tests/test_utils.py:2:import os"
+
+**Search for TODO comments:**
+Input: {"pattern": "TODO|FIXME", "directory_path": "/Users/project"}
+Output: "Grep results for 'TODO|FIXME' in '/Users/project':
+/Users/project/src/api.py:45:# TODO: Add error handling
+/Users/project/src/db.py:120:# FIXME: This query is slow"
+
+**Search for configuration value:**
+Input: {"pattern": "DATABASE_URL", "directory_path": "/Users/project/config"}
+Output: "Grep results for 'DATABASE_URL' in '/Users/project/config':
+/Users/project/config/settings.py:12:DATABASE_URL = os.getenv('DB_URL')
+/Users/project/config/test.py:8:DATABASE_URL = 'localhost:5432'"
+
+**No matches found:**
+Input: {"pattern": "unicorn", "directory_path": "/Users/project/src"}
+Output: "No matches found for pattern 'unicorn' in '/Users/project/src'."
+
+### Features
+- Recursive search (includes subdirectories)
+- Line numbers included in output
+- Extended regex supported (use | for OR, \\w+ for word patterns, etc.)
+- Ignores binary files automatically
+- Output truncated at 10KB if too large
+
+### Tips
+- Use specific patterns to avoid overwhelming results
+- Chain with `read_file` to see context around matches
+- For case-insensitive search, use regex flag: "(?i)pattern"
+- """
+
 
 class Grep(ToolSchema):
     def __init__(self):
         self.name = "grep"
     
     def description(self):
-        return dedent("""
-        Perform recursive text search for a pattern across files in a directory.
-
-        ### When to Use
-        - Finding where a function, variable, or class is defined
-        - Searching for specific code usage or patterns across a project
-        - Locating configuration values or settings
-        - Finding all occurrences of a string/text in multiple files
-
-        ### When NOT to Use
-        - Use `glob` to find files by name/pattern (not content)
-        - Use `read_file` to inspect a specific file's full contents
-        - Use `run_command "grep ..."` only if you need special grep flags
-
-        ### Parameters
-        - `pattern`: The text or regex pattern to search for (required). Can be:
-          - Literal string: "function_name"
-          - Regex: "def \\w+\\(", "import .*os", "TODO|FIXME"
-        - `directory_path`: Absolute path to search directory (required). Example: "/Users/project/src"
-
-        ### Output Format
-        - Success: "Grep results for '{pattern}' in '{dir}':\\n{file}:{line}:{content}"
-        - No matches: "No matches found for pattern '{pattern}' in '{dir}'."
-        - Error: "Error executing grep: {error_details}"
-
-        ### Examples
-
-        **Find function definition:**
-        Input: {"pattern": "def main", "directory_path": "/Users/project/src"}
-        Output: "Grep results for 'def main' in '/Users/project/src':
-        /Users/project/src/main.py:15:def main():
-        /Users/project/src/app.py:8:    def main(self):"
-
-        **Find import statements:**
-        Input: {"pattern": "import os", "directory_path": "/Users/project"}
-        Output: "Grep results for 'import os' in '/Users/project':
-        /Users/project/src/utils.py:1:import os
-        /Users/project/src/helpers.py:3:import os
-        /Users/project/tests/test_utils.py:2:import os"
-
-        **Search for TODO comments:**
-        Input: {"pattern": "TODO|FIXME", "directory_path": "/Users/project"}
-        Output: "Grep results for 'TODO|FIXME' in '/Users/project':
-        /Users/project/src/api.py:45:# TODO: Add error handling
-        /Users/project/src/db.py:120:# FIXME: This query is slow"
-
-        **Search for configuration value:**
-        Input: {"pattern": "DATABASE_URL", "directory_path": "/Users/project/config"}
-        Output: "Grep results for 'DATABASE_URL' in '/Users/project/config':
-        /Users/project/config/settings.py:12:DATABASE_URL = os.getenv('DB_URL')
-        /Users/project/config/test.py:8:DATABASE_URL = 'localhost:5432'"
-
-        **No matches found:**
-        Input: {"pattern": "unicorn", "directory_path": "/Users/project/src"}
-        Output: "No matches found for pattern 'unicorn' in '/Users/project/src'."
-
-        ### Features
-        - Recursive search (includes subdirectories)
-        - Line numbers included in output
-        - Extended regex supported (use | for OR, \\w+ for word patterns, etc.)
-        - Ignores binary files automatically
-        - Output truncated at 10KB if too large
-
-        ### Tips
-        - Use specific patterns to avoid overwhelming results
-        - Chain with `read_file` to see context around matches
-        - For case-insensitive search, use regex flag: "(?i)pattern"
-        - """)
+        return GREP_DESCRIPTION
     
     def json_schema(self):
         return {
@@ -101,35 +130,46 @@ class Grep(ToolSchema):
         }
     
     def run(self, pattern: str, directory_path: str):
-        # Validate the path exists
-        if not os.path.exists(directory_path):
+        # Validate the path with one stat instead of exists() followed by isdir()
+        try:
+            st = os.stat(directory_path)
+        except FileNotFoundError:
             return f"Error: Path '{directory_path}' does not exist."
+        except (OSError, ValueError) as e:
+            return f"Error: Path '{directory_path}' cannot be accessed: {e}"
         
-        if not os.path.isdir(directory_path):
+        if not stat.S_ISDIR(st.st_mode):
             return f"Error: Path '{directory_path}' is not a directory."
 
         try:
-            # -r: recursive
-            # -n: line numbers
-            # -E: extended regex
-            # -I: ignore binary files
-            result = subprocess.run(
-                ["grep", "-rnEI", pattern, directory_path],
-                capture_output=True,
-                text=True,
-                check=False
-            )
-            
-            if result.returncode == 1:
-                return f"No matches found for pattern '{pattern}' in '{directory_path}'."
-            
-            if result.returncode != 0:
-                return f"Error executing grep: {result.stderr.strip() or 'Unknown error.'}"
+            # stderr goes to a file so a flood of warnings can never block the child while
+            # we are only reading stdout
+            with tempfile.TemporaryFile() as stderr_file:
+                with subprocess.Popen(
+                    _search_command(pattern, directory_path),
+                    stdout=subprocess.PIPE,
+                    stderr=stderr_file
+                ) as proc:
+                    # Read at most what can be shown, then stop the search instead of
+                    # buffering every remaining match only to throw it away
+                    data = proc.stdout.read(READ_LIMIT + 1)
+                    stopped_early = len(data) > READ_LIMIT
+                    if stopped_early:
+                        proc.kill()
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode(errors="replace")
+
+            # Both tools exit 0 on matches, 1 on none and 2 on errors
+            if not stopped_early:
+                if proc.returncode == 1:
+                    return f"No matches found for pattern '{pattern}' in '{directory_path}'."
+                
+                if proc.returncode != 0:
+                    return f"Error executing grep: {stderr.strip() or 'Unknown error.'}"
 
-            output = result.stdout.strip()
-            # Truncate if too long? For now let's just return it.
-            if len(output) > 10000:
-                output = output[:10000] + "\n... (output truncated)"
+            output = data[:READ_LIMIT].decode(errors="replace").strip()
+            if stopped_early or len(output) > OUTPUT_LIMIT:
+                output = output[:OUTPUT_LIMIT] + "\n... (output truncated)"
                 
             return f"Grep results for '{pattern}' in '{directory_path}':\n{output}"
             
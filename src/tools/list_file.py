@@ -1,20 +1,21 @@
 import subprocess
 import os
-from textwrap import dedent
 from .schema import ToolSchema
 
+LIST_FILE_DESCRIPTION = """
+Lists files and directories in a given path. The path parameter must be an absolute path, not a relative path.
+You can optionally provide an array of glob patterns to ignore with the ignore parameter. 
+You should generally prefer the Glob and Grep tools, if you know which directories to search.
+
+Use this tool to get more information about the files and directories in a given path.
+"""
+
 class Ls(ToolSchema):
     def __init__(self):
         self.name = "ls"
     
     def description(self):
-        return dedent("""
-        Lists files and directories in a given path. The path parameter must be an absolute path, not a relative path.
-        You can optionally provide an array of glob patterns to ignore with the ignore parameter. 
-        You should generally prefer the Glob and Grep tools, if you know which directories to search.
-
-        Use this tool to get more information about the files and directories in a given path.
-        """)
+        return LIST_FILE_DESCRIPTION
     
     def json_schema(self):
         return {
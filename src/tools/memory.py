@@ -1,7 +1,25 @@
 from typing import Literal
-from textwrap import dedent
+
+MEMORY_DESCRIPTION = """
+Access and manage a persistent knowledge base (Core Memory) to store critical user information across sessions.
+
+### Guidelines for Use:
+- **Read at start**: Always perform a 'read' operation at the beginning of a conversation to understand the user's context, preferences, and background.
+- **Write immediately**: When the user shares new personal details, technical preferences, or project context, use 'write' to store it instantly.
+- **Be factual**: Store information as clear, third-person facts (e.g., "User prefers Python for scripting").
+- **Focus on longevity**: Only store information that remains relevant across different conversations. Avoid temporary or conversational filler.
+
+### When to Store:
+- Personal details: Name, location, profession, interests.
+- Technical preferences: Tools (e.g., "User prefers Podman over Docker"), languages, coding styles.
+- Project context: Repositories they work on, current tech stack, recurring issues.
+- Explicit requests: "Remember that I always use the production namespace for these commands."
+"""
 
 class MemoryTool():
+    # Reads must observe earlier writes in the same step
+    sequential = True
+
     def __init__(self):
         self.name = "memory_tool"
         self.location = "src/memory/mem.md"
@@ -31,30 +49,15 @@ class MemoryTool():
         }
     
     def description(self):
-        return dedent("""
-        Access and manage a persistent knowledge base (Core Memory) to store critical user information across sessions.
-
-        ### Guidelines for Use:
-        - **Read at start**: Always perform a 'read' operation at the beginning of a conversation to understand the user's context, preferences, and background.
-        - **Write immediately**: When the user shares new personal details, technical preferences, or project context, use 'write' to store it instantly.
-        - **Be factual**: Store information as clear, third-person facts (e.g., "User prefers Python for scripting").
-        - **Focus on longevity**: Only store information that remains relevant across different conversations. Avoid temporary or conversational filler.
-
-        ### When to Store:
-        - Personal details: Name, location, profession, interests.
-        - Technical preferences: Tools (e.g., "User prefers Podman over Docker"), languages, coding styles.
-        - Project context: Repositories they work on, current tech stack, recurring issues.
-        - Explicit requests: "Remember that I always use the production namespace for these commands."
-        """)
+        return MEMORY_DESCRIPTION
     
     def run(self, memory: str = "", operation: Literal["read", "write"] = "read"):
         import os
-        os.makedirs(os.path.dirname(self.location), exist_ok=True)
         
         if operation == "read":
             try:
-                with open(self.location, "r") as f:
-                    memory_content = f.read()
+                with open(self.location, "rb") as f:
+                    memory_content = f.read().decode("utf-8", errors="replace")
                 return memory_content if memory_content else "No memories stored yet."
             except FileNotFoundError:
                 return "No memories stored yet."
@@ -63,6 +66,16 @@ class MemoryTool():
             if not memory:
                 return "Error: Memory content cannot be empty for write operation"
             
-            with open(self.location, "a") as f:  # Changed to "a" (append mode)
-                f.write(f"{memory}\n")
+            # One O_APPEND write per entry is atomic, so concurrent writers never interleave.
+            # The directory is only created the first time the file turns out to be missing
+            flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+            try:
+                fd = os.open(self.location, flags, 0o644)
+            except FileNotFoundError:
+                os.makedirs(os.path.dirname(self.location), exist_ok=True)
+                fd = os.open(self.location, flags, 0o644)
+            try:
+                os.write(fd, f"{memory}\n".encode("utf-8"))
+            finally:
+                os.close(fd)
             return "Memory updated successfully"
\ No newline at end of file
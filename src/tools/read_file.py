@@ -1,55 +1,58 @@
-import subprocess
+import os
 from .schema import ToolSchema
-from textwrap import dedent
+
+MAX_FILE_SIZE = 1024 * 1024  # 1MB
+
+READ_FILE_DESCRIPTION = """
+Read file contents with line numbers. Works for any accessible file on the system.
+
+### When to Use
+- Reading source code, config files, documentation
+- Inspecting docker-compose.yml, Kubernetes manifests, README files
+- Viewing logs or any text-based file
+- Checking file contents before making changes
+
+### When NOT to Use
+- Use `list_file` to just check directory contents
+- Use `grep` to search across multiple files
+- Use `glob` to find files by pattern
+- Use `write_file` to create or modify files
+
+### Parameters
+- `file_path`: Absolute path to the file (required). Example: "/Users/project/app.py"
+
+### Output Format
+- Success: "File Content:\\n{line_number}\\t{content}"
+- Empty file: "File is empty"
+- Not found: "File does not exist"
+- Restricted: "Restricted access to .env (environment) files"
+
+### Examples
+
+**Read a Python file:**
+Input: {"file_path": "/Users/project/src/main.py"}
+Output: "File Content:\\n1\\timport os\\n2\\t\\n3\\tdef main():\\n..."
+
+**Read a Docker Compose file:**
+Input: {"file_path": "/Users/project/docker-compose.yml"}
+Output: "File Content:\\n1\\tversion: '3'\\n2\\tservices:\\n3\\t  web:..."
+
+**File doesn't exist:**
+Input: {"file_path": "/Users/project/missing.txt"}
+Output: "File does not exist"
+
+### Important Constraints
+- .env files are blocked for security
+- Maximum file size: 1MB (larger files will be truncated)
+- Must use absolute paths (starting with / on Unix/macOS)
+"""
 
 class FileReader(ToolSchema):
     def __init__(self):
         self.name = "read_file"
     
     def description(self):
-        return dedent("""
-    Read file contents with line numbers. Works for any accessible file on the system.
-
-    ### When to Use
-    - Reading source code, config files, documentation
-    - Inspecting docker-compose.yml, Kubernetes manifests, README files
-    - Viewing logs or any text-based file
-    - Checking file contents before making changes
-
-    ### When NOT to Use
-    - Use `list_file` to just check directory contents
-    - Use `grep` to search across multiple files
-    - Use `glob` to find files by pattern
-    - Use `write_file` to create or modify files
-
-    ### Parameters
-    - `file_path`: Absolute path to the file (required). Example: "/Users/project/app.py"
-
-    ### Output Format
-    - Success: "File Content:\\n{line_number}\\t{content}"
-    - Empty file: "File is empty"
-    - Not found: "File does not exist"
-    - Restricted: "Restricted access to .env (environment) files"
-
-    ### Examples
-
-    **Read a Python file:**
-    Input: {"file_path": "/Users/project/src/main.py"}
-    Output: "File Content:\\n1\\timport os\\n2\\t\\n3\\tdef main():\\n..."
-
-    **Read a Docker Compose file:**
-    Input: {"file_path": "/Users/project/docker-compose.yml"}
-    Output: "File Content:\\n1\\tversion: '3'\\n2\\tservices:\\n3\\t  web:..."
-
-    **File doesn't exist:**
-    Input: {"file_path": "/Users/project/missing.txt"}
-    Output: "File does not exist"
-
-    ### Important Constraints
-    - .env files are blocked for security
-    - Maximum file size: 1MB (larger files will be truncated)
-    - Must use absolute paths (starting with / on Unix/macOS)
-    """)
+        return READ_FILE_DESCRIPTION
     
     def json_schema(self):
         return {
@@ -75,21 +78,31 @@ class FileReader(ToolSchema):
         if ".env" in file_path:
             return "Restricted access to .env (environment) files"
 
-        file_content = subprocess.run(
-            f"cat -n {file_path}",
-            shell=True,
-            capture_output=True,
-            text=True
-        )
+        # Read directly rather than through `cat -n` in a shell; ~ is still expanded
+        path = os.path.expanduser(file_path)
+        try:
+            with open(path, "rb") as f:
+                data = f.read(MAX_FILE_SIZE + 1)
+        except FileNotFoundError:
+            return "File does not exist"
+        except OSError as e:
+            return f"Error reading file: {file_path}: {e.strerror or e}"
 
-        if file_content.returncode != 0:
-            error_msg = file_content.stderr.strip()
-            if "No such file or directory" in error_msg:
-                return "File does not exist"
-            return f"Error reading file: {error_msg or 'Unknown error.'}"
+        truncated = len(data) > MAX_FILE_SIZE
+        text = data[:MAX_FILE_SIZE].decode("utf-8", errors="replace")
+        lines = text.split("\n")
+        if lines[-1] == "":
+            lines.pop()
 
-        if not file_content.stdout.strip():
+        # Same layout as `cat -n`: right-aligned six-wide line numbers and a tab
+        numbered = "\n".join(f"{i:6}\t{line}" for i, line in enumerate(lines, 1)).strip()
+        if "\r" in numbered:
+            # Text-mode pipes used to translate \r\n and lone \r, so keep output identical
+            numbered = numbered.replace("\r\n", "\n").replace("\r", "\n")
+        if not numbered:
             return "File is empty"
+        if truncated:
+            numbered += "\n... (file truncated at 1MB)"
 
-        return f"File Content:\n{file_content.stdout.strip()}"
+        return f"File Content:\n{numbered}"
         
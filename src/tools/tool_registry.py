@@ -1,3 +1,4 @@
+import asyncio
 from .read_file import FileReader 
 from .write_file import WriteFileTool
 from .list_file import Ls 
@@ -16,12 +17,26 @@ class ToolRegistry:
     def __init__(self, console=None):
         self.tool_box = {}
         self.console = console
+        # Schemas are static per tool, so each is built once when the tool is registered
+        self.tool_schemas = []
+        # Bound run methods and declared parameter names, resolved once per tool
+        self._runners = {}
+        # Coroutine entry points for tools that can await their own I/O
+        self._async_runners = {}
+        self._params = {}
         self.register_all_tools()
 
     def register_tool(self, name, tool_obj):
         if name in self.tool_box:
             raise ValueError(f"Duplicate tool name detected: {name}")
         self.tool_box[name] = tool_obj
+        schema = tool_obj.json_schema()
+        self.tool_schemas.append(schema)
+        parameters = schema["function"].get("parameters") or {}
+        self._runners[name] = tool_obj.run
+        if hasattr(tool_obj, "arun"):
+            self._async_runners[name] = tool_obj.arun
+        self._params[name] = frozenset(parameters.get("properties") or ())
 
     def register_all_tools(self):
         tools = [
@@ -43,16 +58,53 @@ class ToolRegistry:
         for tool in tools:
             self.register_tool(tool.name, tool)
 
-    @property
-    def tool_schemas(self):
-        return [tool.json_schema() for tool in self.tool_box.values()]
+    def is_sequential(self, tool_name: str) -> bool:
+        """Tools that prompt the user or mutate state must not run alongside others."""
+        return getattr(self.tool_box.get(tool_name), "sequential", False)
+
+    def is_interactive(self, tool_name: str) -> bool:
+        """Tools that read from the terminal need any live display stopped first."""
+        return getattr(self.tool_box.get(tool_name), "interactive", False)
+
+    async def arun_tool(self, tool_name: str, arguments: dict) -> str:
+        """
+        Await the tool's own coroutine when it has one; otherwise run it in a worker
+        thread. Either way several tools can overlap their I/O.
+        """
+        async_runner = self._async_runners.get(tool_name)
+        if async_runner is None:
+            return await asyncio.to_thread(self.run_tool, tool_name, arguments)
+
+        error = self._check_arguments(tool_name, arguments)
+        if error:
+            return error
+        try:
+            return await async_runner(**arguments)
+        except TypeError as e:
+            return f"Invalid arguments for '{tool_name}': {e}"
+        except Exception as e:
+            return f"Error executing tool '{tool_name}': {e}"
+
+    def _check_arguments(self, tool_name: str, arguments: dict):
+        """Reject non-object arguments and names the schema does not declare before calling the tool."""
+        # The model can send any JSON value (null, a list, ...) as the arguments
+        if not isinstance(arguments, dict):
+            return f"Invalid arguments for '{tool_name}': expected a JSON object, got {type(arguments).__name__}"
+        unknown = arguments.keys() - self._params[tool_name]
+        if unknown:
+            return f"Invalid arguments for '{tool_name}': unexpected argument(s) {', '.join(sorted(unknown))}"
+        return None
 
     def run_tool(self, tool_name: str, arguments: dict) -> str:
-        if tool_name not in self.tool_box:
+        runner = self._runners.get(tool_name)
+        if runner is None:
             return f"Error: Tool '{tool_name}' not found."
 
+        error = self._check_arguments(tool_name, arguments)
+        if error:
+            return error
         try:
-            return self.tool_box[tool_name].run(**arguments)
+            return runner(**arguments)
         except TypeError as e:
             return f"Invalid arguments for '{tool_name}': {e}"
         except Exception as e:
@@ -1,6 +1,12 @@
 import os
+import time
+import threading
 from .schema import ToolSchema
 
+# Agents often repeat a search verbatim while retrying; keep recent answers briefly
+SEARCH_CACHE_TTL = 300  # seconds
+SEARCH_CACHE_SIZE = 128
+
 class WebSearchTool(ToolSchema):
     """
     Web search tool using Tavily API for documentation lookups and general web searches.
@@ -10,6 +16,12 @@ class WebSearchTool(ToolSchema):
     def __init__(self):
         self.name = "web_search"
         self.api_key = os.environ.get("TAVILY_API_KEY")
+        # Built on the first search and reused, so its HTTP session outlives a single query
+        self._client = None
+        # (query, max_results) -> (monotonic time, formatted results), oldest first
+        self._cache = {}
+        # Parallel tool calls run in worker threads and may store results at the same time
+        self._cache_lock = threading.Lock()
         
     def description(self):
         return (
@@ -54,6 +66,11 @@ class WebSearchTool(ToolSchema):
         Returns:
             Formatted search results with titles, URLs, and content snippets
         """
+        key = (query, max_results)
+        entry = self._cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < SEARCH_CACHE_TTL:
+            return entry[1]
+
         try:
             if not self.api_key:
                 return self._format_error(
@@ -62,17 +79,17 @@ class WebSearchTool(ToolSchema):
                     "Get your API key at: https://tavily.com"
                 )
             
-            # Import here to avoid errors if tavily-python is not installed
-            try:
-                from tavily import TavilyClient
-            except ImportError:
-                return self._format_error(
-                    "tavily-python package not installed. "
-                    "Install it with: pip install tavily-python"
-                )
-            
-            # Initialize client and perform search
-            client = TavilyClient(api_key=self.api_key)
+            client = self._client
+            if client is None:
+                # Import here to avoid errors if tavily-python is not installed
+                try:
+                    from tavily import TavilyClient
+                except ImportError:
+                    return self._format_error(
+                        "tavily-python package not installed. "
+                        "Install it with: pip install tavily-python"
+                    )
+                client = self._client = TavilyClient(api_key=self.api_key)
             
             # Perform search with relevant parameters
             response = client.search(
@@ -83,10 +100,18 @@ class WebSearchTool(ToolSchema):
                 include_raw_content=False # Don't need full page content
             )
             
-            return self._format_results(response)
+            result = self._format_results(response)
             
         except Exception as e:
             return self._format_error(f"Search failed: {str(e)}")
+
+        # Only successful searches are cached, so a failed one is retried next time
+        with self._cache_lock:
+            self._cache.pop(key, None)
+            if len(self._cache) >= SEARCH_CACHE_SIZE:
+                del self._cache[next(iter(self._cache))]
+            self._cache[key] = (time.monotonic(), result)
+        return result
     
     def _format_results(self, response: dict) -> str:
         """Format Tavily API response into readable text."""
@@ -2,14 +2,46 @@ import json
 from pathlib import Path
 from datetime import datetime
 from .schema import ToolSchema
-from textwrap import dedent
 
 
+WORKFLOW_DESCRIPTION = """
+Manages multi-command workflows for complex DevOps tasks.
+
+Use this tool to:
+- Create shell scripts that combine multiple commands into a single workflow
+- Save workflows as reusable templates with descriptive names
+- List available saved workflows
+- Load and execute saved workflows
+- Delete workflows that are no longer needed
+
+Workflows are stored in ~/.shellmind/workflows/ as executable shell scripts.
+Each workflow includes:
+- Descriptive header comments
+- Error handling (set -e to stop on first error)
+- Command grouping with comments
+- Execution timestamps
+
+Actions:
+- 'create': Generate a new workflow from a list of commands
+- 'save': Save the generated workflow as a template
+- 'list': List all saved workflows
+- 'load': Load a saved workflow by name
+- 'delete': Delete a saved workflow
+- 'execute': Generate and immediately offer to execute a workflow
+
+Examples:
+- Create a deployment workflow with build, test, and deploy steps
+- Save a database backup workflow for regular use
+- Create a system health check workflow
+"""
+
 class WorkflowManager(ToolSchema):
     """
     Manages multi-command workflows for complex DevOps tasks.
     Can generate shell scripts for multi-step operations and save them as reusable templates.
     """
+    # Saves and deletes files under ~/.shellmind/workflows, so calls must stay ordered
+    sequential = True
     
     def __init__(self):
         self.name = "workflow_manager"
@@ -17,36 +49,7 @@ class WorkflowManager(ToolSchema):
         self.workflows_dir.mkdir(parents=True, exist_ok=True)
     
     def description(self):
-        return dedent("""
-        Manages multi-command workflows for complex DevOps tasks.
-        
-        Use this tool to:
-        - Create shell scripts that combine multiple commands into a single workflow
-        - Save workflows as reusable templates with descriptive names
-        - List available saved workflows
-        - Load and execute saved workflows
-        - Delete workflows that are no longer needed
-        
-        Workflows are stored in ~/.shellmind/workflows/ as executable shell scripts.
-        Each workflow includes:
-        - Descriptive header comments
-        - Error handling (set -e to stop on first error)
-        - Command grouping with comments
-        - Execution timestamps
-        
-        Actions:
-        - 'create': Generate a new workflow from a list of commands
-        - 'save': Save the generated workflow as a template
-        - 'list': List all saved workflows
-        - 'load': Load a saved workflow by name
-        - 'delete': Delete a saved workflow
-        - 'execute': Generate and immediately offer to execute a workflow
-        
-        Examples:
-        - Create a deployment workflow with build, test, and deploy steps
-        - Save a database backup workflow for regular use
-        - Create a system health check workflow
-        """)
+        return WORKFLOW_DESCRIPTION
     
     def json_schema(self):
         return {
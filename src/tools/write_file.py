@@ -1,75 +1,79 @@
 import os
 from .schema import ToolSchema
-from textwrap import dedent
 
-class WriteFileTool(ToolSchema):
-    def __init__(self):
-        self.name = "write_file"
+WRITE_FILE_DESCRIPTION = """
+Write content to a file, creating directories if needed.
 
-    def description(self):
-        return dedent("""
-        Write content to a file, creating directories if needed.
-
-        ### When to Use
-        - Creating new files (config files, scripts, documentation)
-        - Modifying existing file contents
-        - Saving generated code, configurations, or outputs
-        - Writing logs or reports to disk
-
-        ### When NOT to Use
-        - Use `read_file` to only view file contents
-        - Use `run_command "cat file > newfile"` for simple copies (use write_file instead)
-        - Be cautious when modifying system files or critical configs
-
-        ### Parameters
-        - `file_path`: Absolute path where the file should be written (required). Example: "/Users/project/config.yml"
-        - `content`: The text content to write to the file (required). Can be multi-line.
-
-        ### Output Format
-        - Success: "File written successfully"
-        - Error: "Error writing file: {reason}"
-
-        ### Examples
-
-        **Create a Python script:**
-        Input: {
-            "file_path": "/Users/project/scripts/setup.py",
-            "content": "#!/usr/bin/env python3\\nimport os\\n\\ndef setup():\\n    print('Setting up...')\\n"
-        }
-        Output: "File written successfully"
+### When to Use
+- Creating new files (config files, scripts, documentation)
+- Modifying existing file contents
+- Saving generated code, configurations, or outputs
+- Writing logs or reports to disk
 
-        **Write a configuration file:**
-        Input: {
-            "file_path": "/Users/project/config/app.yml",
-            "content": "version: '3'\\nservices:\\n  web:\\n    image: nginx:latest\\n    ports:\\n      - '80:80'\\n"
-        }
-        Output: "File written successfully"
+### When NOT to Use
+- Use `read_file` to only view file contents
+- Use `run_command "cat file > newfile"` for simple copies (use write_file instead)
+- Be cautious when modifying system files or critical configs
 
-        **Create a README:**
-        Input: {
-            "file_path": "/Users/project/README.md",
-            "content": "# My Project\\n\\nThis is a sample project.\\n\\n## Installation\\n\\nRun `npm install` to get started.\\n"
-        }
-        Output: "File written successfully"
+### Parameters
+- `file_path`: Absolute path where the file should be written (required). Example: "/Users/project/config.yml"
+- `content`: The text content to write to the file (required). Can be multi-line.
 
-        **Overwrite an existing file:**
-        Input: {
-            "file_path": "/Users/project/existing.txt",
-            "content": "This replaces the previous content completely."
-        }
-        Output: "File written successfully"
+### Output Format
+- Success: "File written successfully"
+- Error: "Error writing file: {reason}"
+
+### Examples
+
+**Create a Python script:**
+Input: {
+    "file_path": "/Users/project/scripts/setup.py",
+    "content": "#!/usr/bin/env python3\\nimport os\\n\\ndef setup():\\n    print('Setting up...')\\n"
+}
+Output: "File written successfully"
+
+**Write a configuration file:**
+Input: {
+    "file_path": "/Users/project/config/app.yml",
+    "content": "version: '3'\\nservices:\\n  web:\\n    image: nginx:latest\\n    ports:\\n      - '80:80'\\n"
+}
+Output: "File written successfully"
 
-        ### Features
-        - Creates parent directories automatically if they don't exist
-        - Overwrites existing files completely (no append mode)
-        - Must use absolute paths (starting with / on Unix/macOS)
+**Create a README:**
+Input: {
+    "file_path": "/Users/project/README.md",
+    "content": "# My Project\\n\\nThis is a sample project.\\n\\n## Installation\\n\\nRun `npm install` to get started.\\n"
+}
+Output: "File written successfully"
 
-        ### Important Notes
-        - This tool OVERWRITES existing files completely
-        - No backup is created before overwriting
-        - Use `read_file` first if you need to check existing contents
-        - Consider using `todo_manager` when making multiple file changes
-        """)
+**Overwrite an existing file:**
+Input: {
+    "file_path": "/Users/project/existing.txt",
+    "content": "This replaces the previous content completely."
+}
+Output: "File written successfully"
+
+### Features
+- Creates parent directories automatically if they don't exist
+- Overwrites existing files completely (no append mode)
+- Must use absolute paths (starting with / on Unix/macOS)
+
+### Important Notes
+- This tool OVERWRITES existing files completely
+- No backup is created before overwriting
+- Use `read_file` first if you need to check existing contents
+- Consider using `todo_manager` when making multiple file changes
+"""
+
+class WriteFileTool(ToolSchema):
+    # Later reads in the same step must see the written file
+    sequential = True
+
+    def __init__(self):
+        self.name = "write_file"
+
+    def description(self):
+        return WRITE_FILE_DESCRIPTION
 
     def json_schema(self):
         return {
@@ -97,13 +101,20 @@ class WriteFileTool(ToolSchema):
     def run(self, file_path: str, content: str):
         
         try:
-            # Create directories if they don't exist
-            directory = os.path.dirname(file_path)
-            if directory and not os.path.exists(directory):
+            # Encode up front: one pass, one write, and an unencodable string fails before
+            # the existing file is truncated
+            data = content.encode("utf-8")
+            try:
+                f = open(file_path, "wb")
+            except FileNotFoundError:
+                # Create directories only when they turn out to be missing
+                directory = os.path.dirname(file_path)
+                if not directory:
+                    raise
                 os.makedirs(directory, exist_ok=True)
-
-            with open(file_path, "w") as f:
-                f.write(content)
+                f = open(file_path, "wb")
+            with f:
+                f.write(data)
             return "File written successfully"
         except Exception as e:
             return f"Error writing file: {e}"
\ No newline at end of file
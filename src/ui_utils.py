@@ -1,8 +1,12 @@
 """UI utilities for enhanced display formatting"""
-import json
 import re
-from rich.syntax import Syntax
+from functools import lru_cache
+from typing import TYPE_CHECKING
 from rich.text import Text
+from .serialization import loads as json_loads, JSONDecodeError
+
+if TYPE_CHECKING:
+    from rich.syntax import Syntax
 
 # Enhanced color scheme
 THEME_COMMAND = "dodger_blue2"
@@ -10,6 +14,22 @@ THEME_FLAG = "bright_yellow"
 THEME_ARG = "white"
 THEME_EXPLANATION = "grey70"
 
+# Pygments tokenizes the whole buffer, so larger outputs are shown as plain text
+MAX_HIGHLIGHT_SIZE = 64 * 1024  # characters
+
+# Content-type and flag patterns, compiled once at import
+YAML_KEY_LINE = re.compile(r'^\s*[\w-]+:\s*[\w\s-]*$', re.MULTILINE)
+# Same matches as r'\d{4}-\d{2}-\d{2}|\d{2}:\d{2}:\d{2}|ERROR|WARN|INFO|DEBUG'. Starting with a
+# character class lets the engine skip straight to candidate characters instead of trying
+# every alternative at every position; the lookbehinds then pick the alternative.
+LOG_MARKERS = re.compile(
+    r'[\dEWID](?:(?<=\d)\d(?:\d\d-\d\d-|:\d\d:)\d\d|(?<=E)RROR|(?<=W)ARN|(?<=I)NFO|(?<=D)EBUG)'
+)
+SHELL_SYNTAX = re.compile(r'\$\{|\$\(|export |function ')
+PYTHON_STATEMENT = re.compile(r'^(def|class|import|from)\s+', re.MULTILINE)
+DOCKERFILE_INSTRUCTION = re.compile(r'^(FROM|RUN|COPY|CMD|ENTRYPOINT)', re.MULTILINE)
+FLAG_TOKEN = re.compile(r'\s-+\w+')
+
 # Common shell command flags and their explanations
 COMMON_FLAGS = {
     # ls flags
@@ -55,46 +75,59 @@ COMMON_FLAGS = {
     '-q': 'quiet mode',
 }
 
+# (flag, substring of the command name, explanation); the first match for a flag wins
+FLAG_OVERRIDES = (
+    ('-a', 'docker', 'all containers'),
+    ('-f', 'kubectl', 'file'),
+    ('-f', 'rm', 'force'),
+)
+
 def detect_content_type(content: str) -> str:
     """Detect the content type for syntax highlighting"""
     content = content.strip()
     
-    # Check for JSON
-    if content.startswith('{') or content.startswith('['):
+    # Check for JSON; a document that opens with a bracket must close with the matching one,
+    # so anything else is rejected without parsing it
+    if content[:1] + content[-1:] in ('{}', '[]'):
         try:
-            json.loads(content)
+            json_loads(content)
             return 'json'
-        except (json.JSONDecodeError, ValueError):
+        except (JSONDecodeError, ValueError):
             pass
     
     # Check for YAML (common in k8s configs)
-    if re.search(r'^\s*[\w-]+:\s*[\w\s-]*$', content, re.MULTILINE):
-        if 'apiVersion:' in content or 'kind:' in content:
+    # The substring test is far cheaper than the line regex, so it goes first
+    if 'apiVersion:' in content or 'kind:' in content:
+        if YAML_KEY_LINE.search(content):
             return 'yaml'
     
     # Check for common log patterns
-    if re.search(r'\d{4}-\d{2}-\d{2}|\d{2}:\d{2}:\d{2}|ERROR|WARN|INFO|DEBUG', content):
+    if LOG_MARKERS.search(content):
         return 'log'
     
     # Check for shell scripts
-    if content.startswith('#!') or re.search(r'\$\{|\$\(|export |function ', content):
+    if content.startswith('#!') or SHELL_SYNTAX.search(content):
         return 'bash'
     
     # Check for Python
-    if re.search(r'^(def|class|import|from)\s+', content, re.MULTILINE):
+    if PYTHON_STATEMENT.search(content):
         return 'python'
     
     # Check for Dockerfile
-    if re.search(r'^(FROM|RUN|COPY|CMD|ENTRYPOINT)', content, re.MULTILINE):
+    if DOCKERFILE_INSTRUCTION.search(content):
         return 'dockerfile'
     
     return None
 
-def syntax_highlight_output(content: str, detected_type: str = None) -> Syntax | str:
+def syntax_highlight_output(content: str, detected_type: str = None) -> "Syntax | str":
     """Apply syntax highlighting to output content"""
     if not content or len(content.strip()) == 0:
         return content
     
+    # Too large to tokenize without stalling the UI; this also skips detection
+    if len(content) > MAX_HIGHLIGHT_SIZE:
+        return content
+    
     # Auto-detect if not provided
     if not detected_type:
         detected_type = detect_content_type(content)
@@ -103,6 +136,9 @@ def syntax_highlight_output(content: str, detected_type: str = None) -> Syntax |
     if not detected_type or len(content) < 20:
         return content
     
+    # rich.syntax pulls in pygments; only pay for it when something is highlighted
+    from rich.syntax import Syntax
+
     try:
         # Special handling for logs - use dracula theme for better visibility
         if detected_type == 'log':
@@ -122,33 +158,21 @@ def add_inline_explanations(command: str) -> Text:
         return Text(command)
     
     cmd_name = parts[0]
+    # Context-specific overrides for ambiguous flags, resolved once for this command
+    overrides = {}
+    for flag, command_part, explanation in FLAG_OVERRIDES:
+        if command_part in cmd_name:
+            overrides.setdefault(flag, explanation)
+
     result = Text()
-    result.append(parts[0], style="bold " + THEME_COMMAND)  # Command name
+    result.append(cmd_name, style="bold " + THEME_COMMAND)  # Command name
     
-    i = 1
-    while i < len(parts):
-        part = parts[i]
+    for part in parts[1:]:
         result.append(" ")
         
-        # Check if it's a flag we recognize
-        flag_explanation = None
-        if part.startswith('-') and part in COMMON_FLAGS:
-            flag_explanation = COMMON_FLAGS[part]
-        elif part.startswith('--') and part in COMMON_FLAGS:
-            flag_explanation = COMMON_FLAGS[part]
-        
-        # Add context-aware overrides for ambiguous flags
+        # Check if it's a flag we recognize; every known flag starts with '-'
+        flag_explanation = overrides.get(part) or COMMON_FLAGS.get(part)
         if flag_explanation:
-            # Context-specific overrides
-            if part == '-a' and 'docker' in cmd_name:
-                flag_explanation = 'all containers'
-            elif part == '-f' and 'kubectl' in cmd_name:
-                flag_explanation = 'file'
-            elif part == '-f' and 'rm' in cmd_name:
-                flag_explanation = 'force'
-            elif part == '-r' and 'grep' in cmd_name:
-                flag_explanation = 'recursive search'
-            
             result.append(part, style=THEME_FLAG)
             result.append(" ", style="dim")
             result.append("({})".format(flag_explanation), style="dim italic " + THEME_EXPLANATION)
@@ -158,8 +182,6 @@ def add_inline_explanations(command: str) -> Text:
                 result.append(part, style=THEME_FLAG)
             else:
                 result.append(part, style=THEME_ARG)
-        
-        i += 1
     
     return result
 
@@ -168,14 +190,21 @@ def should_add_explanations(command: str) -> bool:
     if not command:
         return False
     
-    # Count flags
-    flag_count = len(re.findall(r'\s-+\w+', command))
+    # Long commands always get explanations, so only short ones need their flags counted
+    if len(command) > 40:
+        return True
     
-    # Add explanations if there are 2+ flags or the command is long
-    return flag_count >= 2 or len(command) > 40
+    # Add explanations if there are 2+ flags
+    return len(FLAG_TOKEN.findall(command)) >= 2
 
 def format_command_with_explanation(command: str) -> Text:
     """Format a command, optionally adding inline explanations for complex commands"""
+    # Text is mutable, so every caller gets its own copy of the cached rendering
+    return _format_command(command).copy()
+
+@lru_cache(maxsize=256)
+def _format_command(command: str) -> Text:
+    """Build the styled Text once per command; cached replies and re-runs repeat the same ones"""
     if should_add_explanations(command):
         return add_inline_explanations(command)
     else: